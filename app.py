@@ -1,8 +1,219 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
+import json
 import os
+import tempfile
+import time
 from slr_parser import SLRParser
+from grammar_cache import GrammarCache, normalize_grammar, grammar_key
+from streaming import iter_json_object, buffered
+from jobs import JobManager, FINISHED
+from table_store import TableStore, StoredGrammar
+from codegen import generate_parser_module
+from incremental_parse import DocumentStore
 
 app = Flask(__name__)
+app.config['GRAMMAR_CACHE_MAX_ENTRIES'] = int(os.environ.get('GRAMMAR_CACHE_MAX_ENTRIES', 128))
+app.config['GRAMMAR_CACHE_MAX_BYTES'] = int(os.environ.get('GRAMMAR_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+app.config['PROFILING'] = os.environ.get('SLR_PROFILING', '1') not in ('0', 'false')
+app.config['MAX_PAGE_SIZE'] = int(os.environ.get('MAX_PAGE_SIZE', 500))
+
+# Grammars with at least JOB_MIN_PRODUCTIONS productions are compiled by /jobs in a worker process
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+app.config['JOB_TIME_LIMIT'] = float(os.environ.get('JOB_TIME_LIMIT', 60))
+app.config['JOB_MEMORY_LIMIT'] = int(os.environ.get('JOB_MEMORY_LIMIT', 1024 * 1024 * 1024))
+app.config['JOB_MIN_PRODUCTIONS'] = int(os.environ.get('JOB_MIN_PRODUCTIONS', 200))
+
+# Compiled tables are also written here and memory-mapped by every worker process; empty disables the store.
+# Past either limit the least recently used files are deleted
+app.config['TABLE_STORE_DIR'] = os.environ.get('TABLE_STORE_DIR', os.path.join(tempfile.gettempdir(), 'slr-tables'))
+app.config['TABLE_STORE_MAX_ENTRIES'] = int(os.environ.get('TABLE_STORE_MAX_ENTRIES', 1024))
+app.config['TABLE_STORE_MAX_BYTES'] = int(os.environ.get('TABLE_STORE_MAX_BYTES', 1024 * 1024 * 1024))
+
+# Documents opened for incremental re-parsing; the least recently edited are closed past the limit
+app.config['DOCUMENT_LIMIT'] = int(os.environ.get('DOCUMENT_LIMIT', 256))
+
+grammar_cache = GrammarCache(app.config['GRAMMAR_CACHE_MAX_ENTRIES'],
+                             app.config['GRAMMAR_CACHE_MAX_BYTES'])
+job_manager = JobManager(app.config['JOB_WORKERS'],
+                         app.config['JOB_TIME_LIMIT'],
+                         app.config['JOB_MEMORY_LIMIT'])
+
+def store_failed(key, error):
+    # The store only saves work; a full disk must not fail anything
+    app.logger.warning("Could not store compiled grammar %s: %s", key, error)
+
+table_store = TableStore(app.config['TABLE_STORE_DIR'],
+                         app.config['TABLE_STORE_MAX_ENTRIES'],
+                         app.config['TABLE_STORE_MAX_BYTES'],
+                         on_error=store_failed) if app.config['TABLE_STORE_DIR'] else None
+documents = DocumentStore(app.config['DOCUMENT_LIMIT'])
+
+def render_result(parser):
+    return {
+        'success': True,
+        'parsing_table': parser.get_parsing_table_html(),
+        'canonical_collection': parser.get_canonical_collection_html(),
+        'first_follow_sets': parser.get_first_follow_sets_html(),
+        'grammar': str(parser.grammar),
+        'conflicts': parser.conflicts
+    }
+
+def estimate_size(parser, result=None):
+    """Rough footprint of a cache entry in bytes"""
+    if isinstance(parser, StoredGrammar):
+        # Tables stay in the shared mapping; only the decoded symbol table is private
+        size = 64 * (len(parser.symbols) + len(parser.productions))
+    else:
+        size = 64 * (sum(len(item_set.items) for item_set in parser.canonical_collection)
+                     + sum(len(row) for row in parser.action_table)
+                     + sum(len(row) for row in parser.goto_table))
+    if result is not None:
+        size += sum(len(value) for value in result.values() if isinstance(value, str))
+    return size
+
+def check_options(mode, reduction):
+    if mode not in SLRParser.MODES:
+        raise ValueError(f"Unknown table construction mode: {mode}")
+    if reduction not in SLRParser.REDUCTIONS:
+        raise ValueError(f"Unknown grammar reduction: {reduction}")
+
+def compile_grammar(grammar_text, render=True, mode='slr', previous=None, reduction='none'):
+    """Returns the cache entry (handle, parser, result) for the grammar, compiling it on a miss
+
+    The HTML result is rendered on first use and kept with the parser; it is
+    None when render is False and nothing has rendered it yet. previous is
+    the handle of an earlier grammar (usually the one being edited) whose
+    results are reused where the edit did not affect them. reduction is one
+    of SLRParser.REDUCTIONS.
+    """
+    check_options(mode, reduction)
+    normalized = normalize_grammar(grammar_text)
+    key = grammar_key(normalized, mode, reduction)
+    
+    entry = grammar_cache.get(key)
+    g.grammar_cache_hit = entry is not None
+    if entry is None:
+        parser = None
+        if table_store is not None:
+            store_started = time.perf_counter()
+            parser = table_store.load(key)
+            g.table_store_ms = (time.perf_counter() - store_started) * 1000
+            g.table_store_hit = parser is not None
+        if parser is None:
+            # Only a parser built in this process carries what an incremental rebuild needs
+            previous_entry = grammar_cache.peek(previous) if previous else None
+            previous_parser = previous_entry['parser'] if previous_entry is not None else None
+            if not isinstance(previous_parser, SLRParser):
+                previous_parser = None
+            parser = SLRParser(normalized, profile=app.config['PROFILING'], mode=mode, previous=previous_parser,
+                               reduction=reduction)
+            save_compiled(key, parser)
+        entry = {'handle': key, 'parser': parser, 'result': None}
+        grammar_cache.put(key, entry, estimate_size(entry['parser']))
+    
+    if render and entry['result'] is None:
+        entry['result'] = render_result(entry['parser'])
+        grammar_cache.put(key, entry, estimate_size(entry['parser'], entry['result']))
+    
+    return entry
+
+def save_compiled(key, parser):
+    """Queues a freshly compiled parser to be written to the table store, if there is one, off the request"""
+    if table_store is not None:
+        table_store.save_later(key, parser)
+
+def store_compiled(key, parser):
+    """Caches a parser compiled outside the request (by a job) and returns its paged summary"""
+    save_compiled(key, parser)
+    entry = {'handle': key, 'parser': parser, 'result': None}
+    grammar_cache.put(key, entry, estimate_size(parser))
+    return paged_summary(entry)
+
+def paged_summary(entry):
+    """Summary of a compiled grammar; states and table rows are fetched by handle"""
+    parser = entry['parser']
+    terminals, non_terminals = parser.table_columns()
+    return {
+        'success': True,
+        'handle': entry['handle'],
+        'mode': parser.mode,
+        'reduction': parser.reduction,
+        'state_count': len(parser.canonical_collection),
+        'state_sizes': [len(item_set.items) for item_set in parser.canonical_collection],
+        'terminals': terminals,
+        'non_terminals': non_terminals,
+        'first_follow_sets': parser.get_first_follow_sets_html(),
+        'grammar': str(parser.grammar),
+        'conflicts': parser.conflicts
+    }
+
+def check_grammar(grammar_text, mode='slr', reduction='none'):
+    """Reports whether the grammar builds without conflicts, stopping at the first conflicting state
+
+    A compiled grammar already in the cache answers without rebuilding;
+    otherwise nothing is cached, since a check-only build is incomplete.
+    """
+    check_options(mode, reduction)
+    normalized = normalize_grammar(grammar_text)
+    entry = grammar_cache.peek(grammar_key(normalized, mode, reduction))
+    g.grammar_cache_hit = entry is not None
+    if entry is not None:
+        parser = entry['parser']
+        first = parser.conflicts[0]['state'] if parser.conflicts else None
+        conflicts = [conflict for conflict in parser.conflicts if conflict['state'] == first]
+    else:
+        parser = SLRParser(normalized, profile=app.config['PROFILING'], mode=mode, reduction=reduction,
+                           check_only=True)
+        conflicts = parser.conflicts
+    return parser, {
+        'success': True,
+        'mode': mode,
+        'conflict_free': not conflicts,
+        'conflicts': conflicts
+    }
+
+def lookup_grammar(handle):
+    """Returns the parser for a handle from an earlier /parse, or None if it was evicted"""
+    entry = grammar_cache.get(handle)
+    return entry['parser'] if entry is not None else None
+
+def page_bounds(total):
+    """Reads start/count query arguments, clamped to the collection and the page limit"""
+    start = min(max(request.args.get('start', 0, type=int), 0), total)
+    count = min(max(request.args.get('count', 100, type=int), 0), app.config['MAX_PAGE_SIZE'])
+    return start, min(start + count, total)
+
+def expired_handle():
+    return jsonify({'success': False, 'error': 'Unknown or expired grammar handle'}), 404
+
+def server_timing(parser, started):
+    """Builds the Server-Timing header; phase times are only reported when this request compiled the grammar"""
+    cache_hit = g.get('grammar_cache_hit', False)
+    metrics = []
+    if parser is not None and not cache_hit and parser.stats.enabled:
+        metrics.append(parser.stats.server_timing())
+    metrics.append(f'cache;desc="{"hit" if cache_hit else "miss"}"')
+    if 'table_store_ms' in g:
+        metrics.append(f'store;dur={g.table_store_ms:.3f};desc="{"hit" if g.table_store_hit else "miss"}"')
+    metrics.append(f"total;dur={(time.perf_counter() - started) * 1000:.3f}")
+    return ', '.join(metrics)
+
+def stream_result(parser, result, extra_fields=()):
+    """Streams the /parse response, reusing cached HTML when it exists"""
+    if result is not None:
+        fields = list(result.items())
+    else:
+        fields = [
+            ('success', True),
+            ('parsing_table', parser.iter_parsing_table_html()),
+            ('canonical_collection', parser.iter_canonical_collection_html()),
+            ('first_follow_sets', parser.iter_first_follow_sets_html()),
+            ('grammar', str(parser.grammar)),
+            ('conflicts', parser.conflicts)
+        ]
+    fields.extend(extra_fields)
+    return Response(stream_with_context(buffered(iter_json_object(fields))), mimetype='application/json')
 
 @app.route('/')
 def index():
@@ -10,17 +221,75 @@ def index():
 
 @app.route('/parse', methods=['POST'])
 def parse():
+    started = time.perf_counter()
     grammar_text = request.form.get('grammar', '')
+    output_format = request.form.get('format', 'html')
+    stream = request.form.get('stream', '') in ('1', 'true')
+    paged = request.form.get('paged', '') in ('1', 'true')
+    profile = request.form.get('profile', '') in ('1', 'true')
+    mode = request.form.get('mode', 'slr')
+    previous = request.form.get('previous') or None
+    reduction = request.form.get('reduce', 'none')
+    check = request.form.get('check', '') in ('1', 'true')
+    parser = None
     
     try:
-        parser = SLRParser(grammar_text)
+        # Only whether the grammar has conflicts; no tables are kept
+        if check:
+            parser, result = check_grammar(grammar_text, mode=mode, reduction=reduction)
+        # Structured output skips HTML rendering entirely
+        elif output_format == 'json':
+            parser = compile_grammar(grammar_text, render=False, mode=mode, previous=previous,
+                                     reduction=reduction)['parser']
+            result = {'success': True}
+            result.update(parser.to_dict())
+        elif paged:
+            # Only a summary is returned; states and table rows are fetched by handle
+            entry = compile_grammar(grammar_text, render=False, mode=mode, previous=previous, reduction=reduction)
+            parser = entry['parser']
+            result = paged_summary(entry)
+        elif stream:
+            entry = compile_grammar(grammar_text, render=False, mode=mode, previous=previous, reduction=reduction)
+            parser = entry['parser']
+            extra_fields = [('stats', parser.stats.to_dict())] if profile else []
+            response = stream_result(parser, entry['result'], extra_fields)
+            response.headers['Server-Timing'] = server_timing(parser, started)
+            return response
+        else:
+            entry = compile_grammar(grammar_text, mode=mode, previous=previous, reduction=reduction)
+            parser = entry['parser']
+            result = entry['result']
         
+        if profile:
+            result = dict(result, stats=parser.stats.to_dict())
+    except Exception as e:
+        result = {
+            'success': False,
+            'error': str(e)
+        }
+    
+    response = jsonify(result)
+    response.headers['Server-Timing'] = server_timing(parser, started)
+    return response
+
+@app.route('/parse-input', methods=['POST'])
+def parse_input():
+    data = request.get_json(silent=True) or {}
+    grammar_text = data.get('grammar', '')
+    inputs = data.get('inputs', [])
+    build_tree = bool(data.get('tree', False))
+    mode = data.get('mode', 'slr')
+    reduction = data.get('reduce', 'none')
+    
+    # A bare string would be iterated character by character
+    if not isinstance(inputs, list) or not all(isinstance(tokens, (str, list)) for tokens in inputs):
+        return jsonify({'success': False, 'error': 'inputs must be a list of strings or token lists'}), 400
+    
+    try:
+        parser = compile_grammar(grammar_text, render=False, mode=mode, reduction=reduction)['parser']
         result = {
             'success': True,
-            'parsing_table': parser.get_parsing_table_html(),
-            'canonical_collection': parser.get_canonical_collection_html(),
-            'first_follow_sets': parser.get_first_follow_sets_html(),
-            'grammar': str(parser.grammar)
+            'results': [parser.parse(tokens, build_tree) for tokens in inputs]
         }
     except Exception as e:
         result = {
@@ -30,6 +299,179 @@ def parse():
     
     return jsonify(result)
 
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Compiles small or cached grammars right away and queues the rest as a background job"""
+    grammar_text = request.form.get('grammar', '')
+    mode = request.form.get('mode', 'slr')
+    previous = request.form.get('previous') or None
+    reduction = request.form.get('reduce', 'none')
+    
+    try:
+        check_options(mode, reduction)
+        normalized = normalize_grammar(grammar_text)
+        key = grammar_key(normalized, mode, reduction)
+        productions = sum(line.count('|') + 1 for line in normalized.split('\n') if line)
+        
+        stored = grammar_cache.peek(key) is not None or (table_store is not None and table_store.contains(key))
+        if productions < app.config['JOB_MIN_PRODUCTIONS'] or stored:
+            entry = compile_grammar(normalized, render=False, mode=mode, previous=previous, reduction=reduction)
+            return jsonify({'success': True, 'status': 'done', 'result': paged_summary(entry)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+    
+    job = job_manager.submit(normalized, mode, on_done=lambda parser: store_compiled(key, parser),
+                             reduction=reduction)
+    return jsonify(dict(job.to_dict(), success=True)), 202
+
+def unknown_job():
+    return jsonify({'success': False, 'error': 'Unknown or expired job'}), 404
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return unknown_job()
+    return jsonify(dict(job.to_dict(), success=True))
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Streams a JSON line with the job's state every time it changes, until it finishes"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return unknown_job()
+    
+    def generate():
+        snapshot, version = job_manager.wait(job, None, 0)
+        while True:
+            yield json.dumps(snapshot) + '\n'
+            if snapshot['status'] in FINISHED:
+                return
+            snapshot, version = job_manager.wait(job, version, 15)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return unknown_job()
+    return jsonify(dict(job.to_dict(), success=True))
+
+@app.route('/grammars/<handle>/states')
+def grammar_states(handle):
+    parser = lookup_grammar(handle)
+    if parser is None:
+        return expired_handle()
+    
+    start, end = page_bounds(len(parser.canonical_collection))
+    return jsonify({
+        'success': True,
+        'start': start,
+        'total': len(parser.canonical_collection),
+        'states': [parser.get_state_data(state) for state in range(start, end)]
+    })
+
+@app.route('/grammars/<handle>/table')
+def grammar_table(handle):
+    parser = lookup_grammar(handle)
+    if parser is None:
+        return expired_handle()
+    
+    start, end = page_bounds(len(parser.action_table))
+    return jsonify({
+        'success': True,
+        'start': start,
+        'total': len(parser.action_table),
+        'rows': [{'state': state, 'action': parser.action_table[state], 'goto': parser.goto_table[state]}
+                 for state in range(start, end)]
+    })
+
+@app.route('/grammars/<handle>/states/<int:state>/items/<int:index>')
+def grammar_item(handle, state, index):
+    parser = lookup_grammar(handle)
+    if parser is None:
+        return expired_handle()
+    
+    if state >= len(parser.canonical_collection):
+        return jsonify({'success': False, 'error': f"No state {state}"}), 404
+    items = parser.canonical_collection[state].sorted_items()
+    if index >= len(items):
+        return jsonify({'success': False, 'error': f"No item {index} in state {state}"}), 404
+    
+    item = items[index]
+    return jsonify({
+        'success': True,
+        'state': state,
+        'index': index,
+        'item': str(item),
+        'production': item.production,
+        'dot_position': item.dot_position,
+        'next_symbol': item.get_next_symbol()
+    })
+
+@app.route('/grammars/<handle>/parser.py')
+def grammar_parser_module(handle):
+    parser = lookup_grammar(handle)
+    if parser is None:
+        return expired_handle()
+    
+    return Response(generate_parser_module(parser), mimetype='text/x-python',
+                    headers={'Content-Disposition': 'attachment; filename=parser.py'})
+
+@app.route('/grammars/<handle>/documents', methods=['POST'])
+def open_document(handle):
+    """Parses a document with the grammar and keeps its tree so later edits are re-parsed incrementally"""
+    parser = lookup_grammar(handle)
+    if parser is None:
+        return expired_handle()
+    data = request.get_json(silent=True) or {}
+    
+    document_id, document = documents.open(parser)
+    with document.lock:
+        result = document.parse_text(str(data.get('text', '')), bool(data.get('tree', False)))
+        return jsonify({'success': True, 'document': document_id, 'result': result, 'stats': document.stats})
+
+def unknown_document():
+    return jsonify({'success': False, 'error': 'Unknown or closed document'}), 404
+
+@app.route('/documents/<document_id>/edits', methods=['POST'])
+def edit_document(document_id):
+    """Replaces characters start-end with text, or tokens start-end with tokens, and re-parses"""
+    document = documents.get(document_id)
+    if document is None:
+        return unknown_document()
+    data = request.get_json(silent=True) or {}
+    build_tree = bool(data.get('tree', False))
+    started = time.perf_counter()
+    
+    try:
+        start = int(data.get('start', 0))
+        end = int(data.get('end', start))
+        with document.lock:
+            if 'tokens' in data:
+                tokens = data['tokens']
+                result = document.edit(start, end, tokens.split() if isinstance(tokens, str) else tokens, build_tree)
+            else:
+                result = document.edit_text(start, end, str(data.get('text', '')), build_tree)
+            stats = dict(document.stats)
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)})
+    
+    response = jsonify({'success': True, 'result': result, 'stats': stats})
+    response.headers['Server-Timing'] = f"reparse;dur={(time.perf_counter() - started) * 1000:.3f}"
+    return response
+
+@app.route('/documents/<document_id>', methods=['DELETE'])
+def close_document(document_id):
+    if documents.close(document_id) is None:
+        return unknown_document()
+    return jsonify({'success': True})
+
+@app.route('/cache-stats')
+def cache_stats():
+    return jsonify(grammar_cache.stats())
+
 @app.route('/example')
 def example():
     example_grammar = """E -> E + T | T
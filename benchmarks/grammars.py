@@ -0,0 +1,141 @@
+"""Grammar generators for the benchmark suite
+
+Synthetic generators take a size parameter so construction cost can be
+measured against grammar size; the realistic grammars are fixed.
+"""
+
+
+def precedence_ladder(depth):
+    """Left-recursive binary operator levels E0 ... En, like an expression precedence table"""
+    lines = [f"E{i} -> E{i} op{i} E{i + 1} | E{i + 1}" for i in range(depth)]
+    lines.append(f"E{depth} -> ( E0 ) | id | num")
+    return '\n'.join(lines)
+
+
+def wide_alternation(width):
+    """One non-terminal with many alternatives, each starting with its own keyword"""
+    alternatives = ' | '.join(f"kw{i} X t{i}" for i in range(width))
+    return '\n'.join([
+        "S -> S ; A | A",
+        f"A -> {alternatives}",
+        "X -> id | X , id"
+    ])
+
+
+def long_rhs(length):
+    """Productions whose right-hand sides grow with the size parameter"""
+    body = ' '.join(f"a{i} B" for i in range(length))
+    prefix = ' '.join(f"a{i} B" for i in range(length // 2))
+    return '\n'.join([
+        f"S -> {body} | {prefix} c",
+        "B -> b | ( S )"
+    ])
+
+
+def epsilon_heavy(count):
+    """A sequence of optional elements, each of which can derive ε"""
+    names = [f"O{i}" for i in range(count)]
+    lines = [f"S -> {' '.join(names)} end"]
+    lines.extend(f"{name} -> x{i} {name} | ε" for i, name in enumerate(names))
+    return '\n'.join(lines)
+
+
+SYNTHETIC = {
+    'precedence_ladder': (precedence_ladder, [10, 20, 40, 80, 160, 320]),
+    'wide_alternation': (wide_alternation, [50, 100, 200, 400, 800, 1600]),
+    'long_rhs': (long_rhs, [10, 20, 40, 80, 160, 320]),
+    'epsilon_heavy': (epsilon_heavy, [10, 20, 40, 80, 160, 320]),
+}
+
+
+JSON_GRAMMAR = """Value -> Object | Array | string | number | true | false | null
+Object -> { } | { Members }
+Members -> Pair | Members , Pair
+Pair -> string : Value
+Array -> [ ] | [ Elements ]
+Elements -> Value | Elements , Value"""
+
+
+SQL_GRAMMAR = """Script -> Script ; Stmt | Stmt
+Stmt -> Select | Insert | Update | Delete
+Select -> select Distinct SelectList from TableRefs Where GroupBy Having OrderBy Limit
+Distinct -> distinct | ε
+SelectList -> * | Columns
+Columns -> Columns , Column | Column
+Column -> Expr | Expr as id
+TableRefs -> TableRefs , TableRef | TableRef
+TableRef -> Table | TableRef Join Table on Expr
+Table -> id | id id | ( Select ) id
+Join -> join | inner join | left join | right join | left outer join
+Where -> where Expr | ε
+GroupBy -> group by ExprList | ε
+Having -> having Expr | ε
+OrderBy -> order by OrderList | ε
+OrderList -> OrderList , OrderItem | OrderItem
+OrderItem -> Expr | Expr asc | Expr desc
+Limit -> limit number | limit number offset number | ε
+Insert -> insert into id ( IdList ) values ( ExprList ) | insert into id Select
+Update -> update id set Assignments Where
+Assignments -> Assignments , Assignment | Assignment
+Assignment -> id = Expr
+Delete -> delete from id Where
+IdList -> IdList , id | id
+ExprList -> ExprList , Expr | Expr
+Expr -> Expr or AndExpr | AndExpr
+AndExpr -> AndExpr and NotExpr | NotExpr
+NotExpr -> not NotExpr | Comparison
+Comparison -> Sum = Sum | Sum < Sum | Sum > Sum | Sum <= Sum | Sum >= Sum | Sum <> Sum | Sum like Sum | Sum in ( ExprList ) | Sum is null | Sum is not null | Sum
+Sum -> Sum + Term | Sum - Term | Term
+Term -> Term * Factor | Term / Factor | Factor
+Factor -> - Factor | Primary
+Primary -> id | id . id | number | string | null | ( Expr ) | id ( ExprList ) | id ( * )"""
+
+
+C_GRAMMAR = """TranslationUnit -> TranslationUnit ExternalDecl | ExternalDecl
+ExternalDecl -> FunctionDef | Declaration
+FunctionDef -> Type Declarator CompoundStmt
+Declaration -> Type InitDeclarators ;
+InitDeclarators -> InitDeclarators , InitDeclarator | InitDeclarator
+InitDeclarator -> Declarator | Declarator = AssignExpr
+Type -> Qualifier BaseType | BaseType
+Qualifier -> const | static | extern
+BaseType -> int | char | float | double | void | long | short | unsigned | struct id
+Declarator -> * Declarator | DirectDeclarator
+DirectDeclarator -> id | ( Declarator ) | DirectDeclarator [ ] | DirectDeclarator [ AssignExpr ] | DirectDeclarator ( ) | DirectDeclarator ( Params )
+Params -> Params , Param | Param
+Param -> Type Declarator | Type
+CompoundStmt -> { } | { BlockItems }
+BlockItems -> BlockItems BlockItem | BlockItem
+BlockItem -> Declaration | Stmt
+Stmt -> CompoundStmt | ExprStmt | SelectionStmt | IterationStmt | JumpStmt
+ExprStmt -> ; | Expr ;
+SelectionStmt -> if ( Expr ) Stmt | if ( Expr ) Stmt else Stmt | switch ( Expr ) Stmt
+IterationStmt -> while ( Expr ) Stmt | do Stmt while ( Expr ) ; | for ( ExprStmt ExprStmt ) Stmt | for ( ExprStmt ExprStmt Expr ) Stmt
+JumpStmt -> return ; | return Expr ; | break ; | continue ;
+Expr -> Expr , AssignExpr | AssignExpr
+AssignExpr -> CondExpr | UnaryExpr AssignOp AssignExpr
+AssignOp -> = | += | -= | *= | /=
+CondExpr -> OrExpr | OrExpr ? Expr : CondExpr
+OrExpr -> OrExpr oror AndExpr | AndExpr
+AndExpr -> AndExpr && BitOrExpr | BitOrExpr
+BitOrExpr -> BitOrExpr bitor XorExpr | XorExpr
+XorExpr -> XorExpr ^ BitAndExpr | BitAndExpr
+BitAndExpr -> BitAndExpr & EqExpr | EqExpr
+EqExpr -> EqExpr == RelExpr | EqExpr != RelExpr | RelExpr
+RelExpr -> RelExpr < ShiftExpr | RelExpr > ShiftExpr | RelExpr <= ShiftExpr | RelExpr >= ShiftExpr | ShiftExpr
+ShiftExpr -> ShiftExpr << AddExpr | ShiftExpr >> AddExpr | AddExpr
+AddExpr -> AddExpr + MulExpr | AddExpr - MulExpr | MulExpr
+MulExpr -> MulExpr * CastExpr | MulExpr / CastExpr | MulExpr % CastExpr | CastExpr
+CastExpr -> UnaryExpr | ( Type ) CastExpr
+UnaryExpr -> PostfixExpr | ++ UnaryExpr | -- UnaryExpr | UnaryOp CastExpr | sizeof UnaryExpr | sizeof ( Type )
+UnaryOp -> & | * | + | - | ~ | !
+PostfixExpr -> PrimaryExpr | PostfixExpr [ Expr ] | PostfixExpr ( ) | PostfixExpr ( Args ) | PostfixExpr . id | PostfixExpr arrow id | PostfixExpr ++ | PostfixExpr --
+Args -> Args , AssignExpr | AssignExpr
+PrimaryExpr -> id | constant | string | ( Expr )"""
+
+
+REALISTIC = {
+    'json': JSON_GRAMMAR,
+    'sql_subset': SQL_GRAMMAR,
+    'c_subset': C_GRAMMAR,
+}
@@ -0,0 +1,191 @@
+"""Benchmark harness for the SLR construction pipeline
+
+Builds every benchmark grammar end-to-end (construction plus HTML
+rendering), records wall time, per-phase times and peak memory, and
+compares the results to a stored baseline:
+
+    python -m benchmarks.run
+    python -m benchmarks.run --quick --save-baseline
+
+Absolute times depend on the machine the baseline was recorded on, so by
+default only state and entry counts and each generator's scaling
+exponent are compared; --compare-times also compares times and memory.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+from slr_parser import SLRParser
+from benchmarks.grammars import SYNTHETIC, REALISTIC
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Differences below this many milliseconds are treated as noise
+NOISE_FLOOR_MS = 2.0
+
+# Scaling exponents may grow by this much before it counts as a regression
+EXPONENT_TOLERANCE = 0.3
+
+
+def build(grammar_text, profile=False):
+    parser = SLRParser(grammar_text, profile=profile)
+    parser.get_parsing_table_html()
+    parser.get_canonical_collection_html()
+    parser.get_first_follow_sets_html()
+    return parser
+
+
+def measure(grammar_text, repeat, memory):
+    """Returns timings, phase breakdown, sizes and optionally peak memory for one grammar"""
+    # One untimed run warms up allocator and caches before the timed ones
+    build(grammar_text)
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build(grammar_text)
+        best = min(best, time.perf_counter() - start)
+
+    parser = build(grammar_text, profile=True)
+    result = {
+        'time_ms': round(best * 1000, 3),
+        'phases_ms': parser.stats.to_dict()['phases_ms'],
+        'productions': len(parser.productions),
+        'states': len(parser.canonical_collection),
+        'table_entries': sum(len(row) for row in parser.action_table) + sum(len(row) for row in parser.goto_table)
+    }
+
+    if memory:
+        tracemalloc.start()
+        build(grammar_text)
+        result['peak_kib'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+
+    return result
+
+
+def cases(suite, quick):
+    if suite in ('synthetic', 'all'):
+        for name, (generate, sizes) in SYNTHETIC.items():
+            for size in sizes[:3] if quick else sizes:
+                yield f"{name}[{size}]", name, size, generate(size)
+    if suite in ('realistic', 'all'):
+        for name, grammar_text in REALISTIC.items():
+            yield name, name, None, grammar_text
+
+
+def scaling_exponents(results):
+    """Fits time ~ size^k between the smallest and largest size of each generator"""
+    exponents = {}
+    by_generator = {}
+    for result in results.values():
+        if result['size'] is not None:
+            by_generator.setdefault(result['generator'], []).append(result)
+
+    for generator, runs in by_generator.items():
+        runs.sort(key=lambda run: run['size'])
+        first, last = runs[0], runs[-1]
+        if len(runs) > 1 and first['time_ms'] > 0:
+            exponents[generator] = round(math.log(last['time_ms'] / first['time_ms'])
+                                         / math.log(last['size'] / first['size']), 2)
+    return exponents
+
+
+def compare(results, baseline, threshold, compare_times=False):
+    """Returns human-readable regressions against the baseline"""
+    regressions = []
+    for case, result in results.items():
+        previous = baseline.get(case)
+        if previous is None:
+            continue
+
+        if result['states'] != previous['states']:
+            regressions.append(f"{case}: state count changed {previous['states']} -> {result['states']}")
+        if result['table_entries'] != previous['table_entries']:
+            regressions.append(f"{case}: table entries changed {previous['table_entries']} -> {result['table_entries']}")
+        if not compare_times:
+            continue
+        if (result['time_ms'] > previous['time_ms'] * threshold
+                and result['time_ms'] - previous['time_ms'] > NOISE_FLOOR_MS):
+            regressions.append(f"{case}: time {previous['time_ms']:.1f} ms -> {result['time_ms']:.1f} ms")
+        if 'peak_kib' in result and 'peak_kib' in previous and result['peak_kib'] > previous['peak_kib'] * threshold:
+            regressions.append(f"{case}: peak memory {previous['peak_kib']:.0f} KiB -> {result['peak_kib']:.0f} KiB")
+
+    # Exponents are fitted over the same cases on both sides, so --quick runs compare like with like
+    exponents = scaling_exponents(results)
+    previous_exponents = scaling_exponents({case: baseline[case] for case in results if case in baseline})
+    for generator, exponent in exponents.items():
+        previous = previous_exponents.get(generator)
+        if previous is not None and exponent > previous + EXPONENT_TOLERANCE:
+            regressions.append(f"{generator}: scaling exponent {previous} -> {exponent}")
+    return regressions
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    arg_parser.add_argument('--suite', choices=['synthetic', 'realistic', 'all'], default='all')
+    arg_parser.add_argument('--quick', action='store_true', help='only the three smallest sizes per generator')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='timing runs per grammar; the best is kept')
+    arg_parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc peak-memory run')
+    arg_parser.add_argument('--phases', action='store_true', help='print the per-phase breakdown')
+    arg_parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    arg_parser.add_argument('--save-baseline', action='store_true', help='overwrite the baseline with this run')
+    arg_parser.add_argument('--compare-times', action='store_true',
+                            help='also compare absolute times and memory with the baseline (same machine only)')
+    arg_parser.add_argument('--threshold', type=float, default=1.5,
+                            help='slowdown factor reported as a regression with --compare-times')
+    arg_parser.add_argument('--output', help='also write the results as JSON to this file')
+    args = arg_parser.parse_args(argv)
+
+    results = {}
+    print(f"{'case':<28} {'prods':>6} {'states':>7} {'entries':>8} {'time ms':>10} {'peak KiB':>10}")
+    for case, generator, size, grammar_text in cases(args.suite, args.quick):
+        result = measure(grammar_text, args.repeat, not args.no_memory)
+        result.update(generator=generator, size=size)
+        results[case] = result
+
+        peak = f"{result['peak_kib']:>10.1f}" if 'peak_kib' in result else f"{'-':>10}"
+        print(f"{case:<28} {result['productions']:>6} {result['states']:>7} {result['table_entries']:>8} "
+              f"{result['time_ms']:>10.2f} {peak}")
+        if args.phases:
+            for phase, milliseconds in result['phases_ms'].items():
+                print(f"    {phase:<24} {milliseconds:>10.2f}")
+
+    exponents = scaling_exponents(results)
+    if exponents:
+        print("\nScaling (time ~ size^k):")
+        for generator, exponent in exponents.items():
+            print(f"    {generator:<24} k = {exponent}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold, args.compare_times)
+    if regressions:
+        print("\nRegressions against baseline:")
+        for regression in regressions:
+            print(f"    {regression}")
+        return 1
+
+    print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""Generation of standalone Python parser modules from compiled grammars
+
+The generated module needs only the standard library. Its ACTION/GOTO
+tables are the comb-packed arrays of CompactTable, stored as one
+little-endian int32 bytes literal that is unpacked into lists at import,
+so importing it costs milliseconds and no grammar analysis. Its parse()
+returns the same results as CompactTable.parse:
+
+    python codegen.py grammar.txt -o expr_parser.py --check 500
+"""
+import argparse
+import random
+import sys
+import types
+from array import array
+
+from parse_tables import ERROR, CompactTable
+from slr_parser import SLRParser
+
+# Arrays embedded in the generated module, in the order they are packed
+PACKED_ARRAYS = ('action_base', 'action_values', 'action_check', 'default_reduction',
+                 'goto_base', 'goto_values', 'production_lhs', 'production_length',
+                 'default_offsets', 'default_columns')
+
+HEADER = '''\
+"""LR parser generated by codegen.py{source}
+
+parse(tokens, build_tree=False) takes a string of space-separated
+terminals or a sequence of them and returns a dict with 'accepted',
+'reductions' and 'tree' (if requested), or the error 'position',
+'token' and 'expected' terminals.
+"""
+import sys
+from array import array
+
+MODE = {mode!r}
+TERMINALS = {terminals!r}
+NON_TERMINALS = {non_terminals!r}
+PRODUCTION_NAMES = {production_names!r}
+
+# {names} as little-endian int32
+_LENGTHS = {lengths!r}
+_PACKED = {packed!r}
+'''
+
+DRIVER = '''
+
+def _unpack():
+    data = array('i')
+    data.frombytes(_PACKED)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    arrays = []
+    offset = 0
+    for length in _LENGTHS:
+        arrays.append(data[offset:offset + length].tolist())
+        offset += length
+    return arrays
+
+
+(_action_base, _action_values, _action_check, _default_reduction,
+ _goto_base, _goto_values, _production_lhs, _production_length,
+ _default_offsets, _default_columns) = _unpack()
+_terminal_index = {terminal: column for column, terminal in enumerate(TERMINALS)}
+_state_count = len(_default_reduction)
+del _PACKED
+
+
+def expected_terminals(state):
+    """Terminals with an action in the state: its packed entries and the columns of its default reduction"""
+    base = _action_base[state]
+    columns = set(_default_columns[_default_offsets[state]:_default_offsets[state + 1]])
+    columns.update(column for column in range(len(TERMINALS))
+                   if _action_check[base + column] == state and _action_values[base + column] != 0)
+    return [TERMINALS[column] for column in sorted(columns)]
+
+
+def parse(tokens, build_tree=False):
+    if isinstance(tokens, str):
+        tokens = tokens.split()
+    tokens = list(tokens)
+
+    # Only the appended end marker maps to the '$' column; a '$' in the input is an unknown token
+    columns = [_terminal_index.get(token, -1) if token != '$' else -1 for token in tokens]
+    columns.append(_terminal_index.get('$', -1))
+    tokens.append('$')
+
+    # The check arrays are padded so every base + column slot exists, and
+    # GOTO entries are always defined after a reduction, so it is unchecked
+    action_base = _action_base
+    action_values = _action_values
+    action_check = _action_check
+    default_reduction = _default_reduction
+    goto_base = _goto_base
+    goto_values = _goto_values
+    production_lhs = _production_lhs
+    production_length = _production_length
+    state_count = _state_count
+
+    stack = [0]
+    values = [] if build_tree else None
+    position = 0
+    reductions = 0
+    pending_reductions = 0
+    reduction_limit = state_count * (state_count + 1)
+    column = columns[0]
+
+    while True:
+        state = stack[-1]
+        if column < 0:
+            code = 0
+        else:
+            slot = action_base[state] + column
+            code = action_values[slot] if action_check[slot] == state else default_reduction[state]
+
+        if code > 0:
+            stack.append(code - 1)
+            pending_reductions = 0
+            reduction_limit = state_count * (len(stack) + state_count)
+            if build_tree:
+                values.append(tokens[position])
+            position += 1
+            column = columns[position]
+
+        elif code < -1:
+            production = -code - 1
+            length = production_length[production]
+            if length:
+                del stack[-length:]
+            stack.append(goto_values[goto_base[stack[-1]] + production_lhs[production]])
+            reductions += 1
+            pending_reductions += 1
+            if pending_reductions > reduction_limit:
+                return {'accepted': False, 'position': position, 'token': tokens[position],
+                        'expected': [], 'error': 'reduction cycle'}
+
+            if build_tree:
+                children = values[len(values) - length:] if length else []
+                if length:
+                    del values[-length:]
+                values.append([PRODUCTION_NAMES[production], children])
+
+        elif code == -1:
+            result = {'accepted': True, 'reductions': reductions}
+            if build_tree:
+                result['tree'] = values[-1] if values else None
+            return result
+
+        else:
+            return {'accepted': False, 'position': position, 'token': tokens[position],
+                    'expected': expected_terminals(state)}
+'''
+
+
+def padded_arrays(table):
+    """Returns the table's arrays with the check arrays padded to cover every base + column slot"""
+    arrays = {name: list(getattr(table, name)) for name in CompactTable.ARRAYS}
+    for prefix, width, fill in (('action', len(table.terminals), ERROR), ('goto', len(table.non_terminals), -1)):
+        size = max(arrays[prefix + '_base'], default=0) + width
+        for name, pad in ((prefix + '_values', fill), (prefix + '_check', -1)):
+            arrays[name].extend([pad] * (size - len(arrays[name])))
+    return arrays
+
+
+def generate_parser_module(parser, source=None):
+    """Returns the source of a standalone module that parses with the parser's compact table
+
+    Works for SLRParser and stored grammars alike; source (e.g. the grammar
+    file name) is mentioned in the module docstring.
+    """
+    table = parser.get_compact_table()
+    arrays = padded_arrays(table)
+
+    packed = array('i')
+    for name in PACKED_ARRAYS:
+        packed.extend(arrays[name])
+    if sys.byteorder == 'big':
+        packed.byteswap()
+
+    return HEADER.format(
+        source=f" from {source}" if source else '',
+        mode=parser.mode,
+        terminals=tuple(table.terminals),
+        non_terminals=tuple(table.non_terminals),
+        production_names=tuple(lhs for lhs, _ in table.productions),
+        names=', '.join(PACKED_ARRAYS),
+        lengths=tuple(len(arrays[name]) for name in PACKED_ARRAYS),
+        packed=packed.tobytes()
+    ) + DRIVER
+
+
+def load_module(source, name='generated_parser'):
+    """Executes generated source as a new module without writing it to disk"""
+    module = types.ModuleType(name)
+    exec(compile(source, f"<{name}>", 'exec'), module.__dict__)
+    return module
+
+
+def sample_sentences(parser, count, seed=0, max_depth=8, max_tokens=40):
+    """Random token lists derived from the grammar, plus mutated copies that exercise the error paths"""
+    grammar = parser.grammar
+    rng = random.Random(seed)
+    by_lhs = {}
+    for lhs, rhs in grammar.productions:
+        by_lhs.setdefault(lhs, []).append(rhs.split())
+
+    # Fewest derivation steps for each non-terminal; one that derives no
+    # terminal string never gets a finite cost, and is never expanded
+    cost = {}
+
+    def rhs_cost(rhs):
+        return sum(cost.get(s, float('inf')) if s in by_lhs else 0 for s in rhs)
+
+    changed = True
+    while changed:
+        changed = False
+        for lhs, alternatives in by_lhs.items():
+            for rhs in alternatives:
+                steps = 1 + rhs_cost(rhs)
+                if steps < cost.get(lhs, float('inf')):
+                    cost[lhs] = steps
+                    changed = True
+
+    productive = {lhs: [rhs for rhs in alternatives if rhs_cost(rhs) < float('inf')]
+                  for lhs, alternatives in by_lhs.items()}
+
+    def derive(symbol, out):
+        # Depth first and left to right, with an explicit stack so long derivations cannot overflow
+        pending = [(symbol, 0)]
+        while pending:
+            symbol, depth = pending.pop()
+            if symbol not in by_lhs:
+                out.append(symbol)
+                continue
+            alternatives = productive[symbol]
+            if depth >= max_depth or len(out) >= max_tokens:
+                alternatives = [min(alternatives, key=rhs_cost)]
+            pending.extend((s, depth + 1) for s in reversed(rng.choice(alternatives)))
+
+    # A '$' in the input is an unknown token rather than the end marker, so mutations leave it out
+    terminals = sorted(t for t in grammar.terminals if t != '$') or ['x']
+    sentences = []
+    if grammar.start_symbol not in cost:
+        return sentences
+    for _ in range(count):
+        tokens = []
+        derive(grammar.start_symbol, tokens)
+        sentences.append(tokens)
+        if tokens and rng.random() < 0.5:
+            mutated = list(tokens)
+            position = rng.randrange(len(mutated) + 1)
+            if rng.random() < 0.5 and position < len(mutated):
+                del mutated[position]
+            else:
+                mutated.insert(position, rng.choice(terminals))
+            sentences.append(mutated)
+    return sentences
+
+
+def check_module(parser, module, sentences):
+    """Parses each sentence with the module and the in-process table; returns the sentences whose results differ"""
+    table = parser.get_compact_table()
+    return [tokens for tokens in sentences
+            if module.parse(tokens, build_tree=True) != table.parse(tokens, build_tree=True)]
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    arg_parser.add_argument('grammar', help='grammar file')
+    arg_parser.add_argument('-o', '--output', help='write the module here instead of stdout')
+    arg_parser.add_argument('--mode', choices=SLRParser.MODES, default='slr')
+    arg_parser.add_argument('--reduce', choices=SLRParser.REDUCTIONS, default='none',
+                            help='remove useless symbols (useless) and also unit chains (units) first')
+    arg_parser.add_argument('--check', type=int, default=0, metavar='N',
+                            help='compare the module with the in-process table on N random sentences')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args(argv)
+
+    with open(args.grammar, encoding='utf-8') as f:
+        parser = SLRParser(f.read(), mode=args.mode, reduction=args.reduce)
+    source = generate_parser_module(parser, args.grammar)
+
+    if args.check:
+        sentences = sample_sentences(parser, args.check, args.seed)
+        mismatches = check_module(parser, load_module(source), sentences)
+        print(f"{len(sentences)} sentences checked, {len(mismatches)} mismatches", file=sys.stderr)
+        for tokens in mismatches[:10]:
+            print(f"  mismatch: {' '.join(tokens)}", file=sys.stderr)
+        if mismatches:
+            return 1
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(source)
+    else:
+        sys.stdout.write(source)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
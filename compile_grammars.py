@@ -0,0 +1,185 @@
+"""Compile grammar files in parallel and write one JSON result per line
+
+Arguments are grammar files, directories (searched recursively for files
+matching --pattern) or glob patterns. Results are written in input order:
+
+    python compile_grammars.py grammars/ -o results.jsonl
+    python compile_grammars.py 'grammars/**/*.txt' --mode lalr --fail-fast -j 8
+    python compile_grammars.py grammars/ --check --strict
+
+The exit status is 1 if any grammar failed (or, with --strict, has conflicts).
+--check only validates: each build stops at its first conflicting state.
+"""
+import argparse
+import fnmatch
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from slr_parser import SLRParser
+
+
+def find_grammar_files(paths, pattern):
+    """Expands files, directories and glob patterns into a sorted, de-duplicated list of files"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+                files.extend(os.path.join(root, name) for name in sorted(names)
+                             if not name.startswith('.') and fnmatch.fnmatch(name, pattern))
+        elif glob.has_magic(path):
+            files.extend(sorted(f for f in glob.glob(path, recursive=True) if os.path.isfile(f)))
+        else:
+            files.append(path)
+
+    seen = set()
+    return [f for f in files if not (f in seen or seen.add(f))]
+
+
+def compile_file(path, mode, tables, reduction='none', check_only=False):
+    """Worker: compiles one grammar file and returns (ok, has conflicts, result as a JSON line)
+
+    Serializing in the worker keeps the parent down to writing lines.
+    """
+    started = time.perf_counter()
+    result = {'file': path, 'mode': mode}
+    try:
+        with open(path, encoding='utf-8') as f:
+            grammar_text = f.read()
+
+        parser = SLRParser(grammar_text, profile=True, mode=mode, reduction=reduction, check_only=check_only)
+
+        result.update({
+            'ok': True,
+            'states': len(parser.canonical_collection),
+            'productions': len(parser.productions),
+            'reduction': parser.reduction,
+            'conflicts': parser.conflicts,
+            'stats': parser.stats.to_dict()
+        })
+        if tables and not check_only:
+            terminals, non_terminals = parser.table_columns()
+            result.update(terminals=terminals, non_terminals=non_terminals,
+                          action=parser.action_table, goto=parser.goto_table)
+    except Exception as e:
+        result.update(ok=False, error=f"{type(e).__name__}: {e}")
+
+    result['time_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return result['ok'], bool(result.get('conflicts')), json.dumps(result)
+
+
+def compile_alone(path, *options):
+    """compile_file in a worker of its own, recording the grammar as failed if the worker dies"""
+    executor = ProcessPoolExecutor(max_workers=1)
+    try:
+        return executor.submit(compile_file, path, *options).result()
+    except BrokenProcessPool:
+        return False, False, json.dumps({'file': path, 'mode': options[0], 'ok': False,
+                                         'error': "BrokenProcessPool: the worker process died"})
+    finally:
+        executor.shutdown()
+
+
+def compile_all(files, jobs, *options):
+    """Yields compile_file's results for files in input order
+
+    At most jobs grammars are in flight, one per worker. A worker that
+    dies (killed for using too much memory, say) breaks the whole pool
+    without saying which grammar did it, so each grammar in flight at that
+    moment is compiled again in a worker of its own, and only the one that
+    crashed it is recorded as failed. The rest continue in a fresh pool.
+    """
+    results = {}    # input index -> result, until every earlier one is yielded
+    running = {}    # future -> input index
+    submitted = 0
+    yielded = 0
+    executor = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        while yielded < len(files):
+            while submitted < len(files) and len(running) < jobs:
+                running[executor.submit(compile_file, files[submitted], *options)] = submitted
+                submitted += 1
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            if not any(isinstance(future.exception(), BrokenProcessPool) for future in done):
+                for future in done:
+                    results[running.pop(future)] = future.result()
+            else:
+                # Every other future of the broken pool fails soon after; those that finished first keep their results
+                wait(running)
+                for future, index in sorted(running.items(), key=lambda entry: entry[1]):
+                    if isinstance(future.exception(), BrokenProcessPool):
+                        results[index] = compile_alone(files[index], *options)
+                    else:
+                        results[index] = future.result()
+                running = {}
+                executor.shutdown()
+                executor = ProcessPoolExecutor(max_workers=jobs)
+            while yielded in results:
+                yield results.pop(yielded)
+                yielded += 1
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    arg_parser.add_argument('paths', nargs='+', help='grammar files, directories or glob patterns')
+    arg_parser.add_argument('--pattern', default='*', help='file name pattern used inside directories')
+    arg_parser.add_argument('--mode', choices=SLRParser.MODES, default='slr')
+    arg_parser.add_argument('--reduce', choices=SLRParser.REDUCTIONS, default='none',
+                            help='remove useless symbols (useless) and also unit chains (units) first')
+    arg_parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='worker processes')
+    arg_parser.add_argument('-o', '--output', help='write JSON lines to this file instead of stdout')
+    arg_parser.add_argument('--no-tables', action='store_true', help='leave the ACTION/GOTO rows out of the results')
+    arg_parser.add_argument('--check', action='store_true',
+                            help='only look for conflicts, stopping each grammar at its first conflicting state')
+    arg_parser.add_argument('--strict', action='store_true', help='treat grammars with conflicts as failures')
+    failure_mode = arg_parser.add_mutually_exclusive_group()
+    failure_mode.add_argument('--fail-fast', action='store_true', help='stop at the first failure in input order')
+    failure_mode.add_argument('--keep-going', action='store_true', help='compile every grammar (the default)')
+    args = arg_parser.parse_args(argv)
+
+    files = find_grammar_files(args.paths, args.pattern)
+    if not files:
+        print("No grammar files found", file=sys.stderr)
+        return 1
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    started = time.perf_counter()
+    counts = {'ok': 0, 'failed': 0, 'conflicts': 0}
+    results = compile_all(files, max(args.jobs, 1), args.mode, not args.no_tables, args.reduce, args.check)
+    try:
+        # Results are written in input order as soon as each one and all before it are done
+        for ok, has_conflicts, line in results:
+            out.write(line + '\n')
+            counts['ok' if ok else 'failed'] += 1
+            if has_conflicts:
+                counts['conflicts'] += 1
+
+            if args.fail_fast and (not ok or (args.strict and has_conflicts)):
+                break
+    finally:
+        # Closing the generator shuts its workers down and cancels what has not started
+        results.close()
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+
+    elapsed = time.perf_counter() - started
+    skipped = len(files) - counts['ok'] - counts['failed']
+    print(f"{len(files)} grammars: {counts['ok']} compiled, {counts['failed']} failed, "
+          f"{counts['conflicts']} with conflicts, {skipped} skipped in {elapsed:.2f}s", file=sys.stderr)
+
+    if counts['failed'] or (args.strict and counts['conflicts']):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def normalize_grammar(grammar_text):
+    """Returns the grammar with comments, blank lines and insignificant whitespace removed"""
+    lines = []
+    for i, line in enumerate(grammar_text.strip().split('\n')):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        # Reported here so the line number refers to the text the user wrote
+        parts = line.split('->')
+        if len(parts) != 2:
+            raise ValueError(f"Invalid production format in line {i+1}: {line}")
+
+        lhs = parts[0].strip()
+        rhs_parts = [' '.join(rhs.split()) for rhs in parts[1].split('|')]
+        lines.append(f"{lhs} -> {' | '.join(rhs_parts)}")
+    return '\n'.join(lines)
+
+
+def grammar_key(normalized_text, mode='slr', reduction='none'):
+    variant = mode if reduction == 'none' else f"{mode}+{reduction}"
+    return hashlib.sha256(f"{variant}\n{normalized_text}".encode('utf-8')).hexdigest()
+
+
+class GrammarCache:
+    """Bounded LRU cache of compiled grammars keyed by the hash of the normalized grammar"""
+
+    def __init__(self, max_entries=128, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (value, size)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key):
+        """Returns the entry without counting a hit or miss or refreshing its position"""
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry[0] if entry is not None else None
+
+    def put(self, key, value, size):
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+
+            # Entries larger than the whole budget are never stored
+            if size > self.max_bytes or self.max_entries <= 0:
+                return
+
+            self.entries[key] = (value, size)
+            self.total_bytes += size
+
+            # Evict least recently used entries until both limits hold
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,147 @@
+"""Grammar reduction before automaton construction, and unit reduction elimination after it
+
+reduce_grammar removes useless symbols: non-terminals that derive no
+terminal string, and symbols unreachable from the start symbol. The
+language is unchanged; the states and table columns those symbols would
+have added are never built. Each remaining production remembers its
+number in the grammar as written (grammar.production_origin).
+
+unit_goto_redirects finds the states whose only action is a unit
+reduction A -> B. A GOTO on B into such a state can go straight to the
+GOTO on A, so the compact table skips those states entirely.
+"""
+
+LEVELS = ('none', 'useless', 'units')
+
+
+def productive_symbols(productions, non_terminals):
+    """Non-terminals that derive some terminal string"""
+    productive = set()
+    changed = True
+    while changed:
+        changed = False
+        for lhs, rhs in productions:
+            if lhs not in productive and all(s in productive or s not in non_terminals for s in rhs.split()):
+                productive.add(lhs)
+                changed = True
+    return productive
+
+
+def reachable_symbols(productions, start_symbol):
+    """Symbols that occur in some sentential form derived from the start symbol"""
+    by_lhs = {}
+    for lhs, rhs in productions:
+        by_lhs.setdefault(lhs, []).append(rhs)
+    reached = {start_symbol}
+    pending = [start_symbol]
+    while pending:
+        for rhs in by_lhs.get(pending.pop(), ()):
+            for symbol in rhs.split():
+                if symbol not in reached:
+                    reached.add(symbol)
+                    pending.append(symbol)
+    return reached
+
+
+def reduce_grammar(grammar, level='useless'):
+    """Removes useless symbols from a parsed, not yet augmented Grammar in place
+
+    Sets grammar.production_origin to each production's number in the
+    grammar as written and grammar.reduction to a JSON-serializable summary.
+    """
+    if level not in LEVELS:
+        raise ValueError(f"Unknown grammar reduction: {level}")
+    if grammar.augmented:
+        raise ValueError("Grammar reduction must run before augmentation")
+    if level == 'none':
+        return grammar
+
+    original = list(grammar.productions)
+    non_terminals = grammar.non_terminals
+    start_symbol = grammar.start_symbol
+
+    # Unproductive symbols go first: dropping them can make more symbols unreachable
+    productive = productive_symbols(original, non_terminals)
+    if start_symbol not in productive:
+        raise ValueError(f"The start symbol {start_symbol} does not derive any terminal string")
+    kept = [p for p, (lhs, rhs) in enumerate(original)
+            if lhs in productive and all(s in productive or s not in non_terminals for s in rhs.split())]
+    reachable = reachable_symbols([original[p] for p in kept], start_symbol)
+    kept = [p for p in kept if original[p][0] in reachable]
+
+    symbols = grammar.terminals | non_terminals
+    removed = set(range(len(original))).difference(kept)
+    grammar.productions = [original[p] for p in kept]
+    grammar.production_origin = kept
+    grammar.non_terminals = {lhs for lhs, _ in grammar.productions} | {start_symbol}
+    grammar.terminals = {s for _, rhs in grammar.productions for s in rhs.split() if s not in grammar.non_terminals}
+    grammar.reduction = {
+        'level': level,
+        'removed_symbols': sorted(symbols - grammar.terminals - grammar.non_terminals),
+        'removed_productions': [list(original[p]) for p in sorted(removed)]
+    }
+    grammar.intern_symbols()
+    return grammar
+
+
+def unit_goto_redirects(parser):
+    """Returns ({(state, non-terminal): new GOTO target}, skipped states) for the parser's unit reduction states
+
+    A state qualifies when every action in it reduces by the same
+    production A -> B and it has no GOTO entries. It is only entered by a
+    GOTO on B from some state s, and reducing pops straight back to s, so
+    that GOTO can target GOTO(s, A) instead. Chains A -> B -> C are
+    followed as far as they go; one that ends in a unit state it cannot
+    bypass still goes straight to that state. The skipped state only reduced on lookaheads that
+    GOTO(s, A) can shift or reduce on, so a bad token is still rejected
+    before it is shifted.
+    """
+    grammar = parser.grammar
+    unit_lhs = {}  # unit reduction state -> A
+    for state, (actions, gotos) in enumerate(zip(parser.action_table, parser.goto_table)):
+        codes = set(actions.values())
+        if gotos or len(codes) != 1:
+            continue
+        code = codes.pop()
+        if code[0] != 'r' or code == 'r0':
+            continue
+        production = int(code[1:])
+        rhs = grammar.production_rhs[production]
+        if len(rhs) == 1 and grammar.is_non_terminal[rhs[0]]:
+            unit_lhs[state] = grammar.productions[production][0]
+
+    redirects = {}
+    for state, gotos in enumerate(parser.goto_table):
+        for non_terminal, target in gotos.items():
+            seen = set()
+            while target in unit_lhs and target not in seen and unit_lhs[target] in gotos:
+                seen.add(target)
+                target = gotos[unit_lhs[target]]
+            if target != gotos[non_terminal]:
+                redirects[(state, non_terminal)] = target
+
+    # A unit state is skipped only if no GOTO into it is left
+    remaining = set()
+    for state, gotos in enumerate(parser.goto_table):
+        for non_terminal, target in gotos.items():
+            remaining.add(redirects.get((state, non_terminal), target))
+    skipped = sorted(state for state in unit_lhs if state not in remaining)
+    return redirects, skipped
+
+
+def reduction_summary(parser):
+    """The grammar's reduction summary, plus the states the compact table skips
+
+    production_origin maps each production id (the rN of the tables) to
+    the id the same production has without reduction, 0 being the
+    augmented start production.
+    """
+    reduction = parser.grammar.reduction
+    if reduction is None:
+        return None
+    summary = dict(reduction)
+    summary['production_origin'] = [0 if origin is None else origin + 1
+                                    for origin in parser.grammar.production_origin]
+    if reduction['level'] == 'units':
+        summary['unit_states'] = parser.skipped_states
+    return summary
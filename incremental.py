@@ -0,0 +1,209 @@
+"""Reuse of a previous compilation when a grammar is edited
+
+GrammarDiff compares the productions of a newly parsed grammar with the
+grammar of a previously built parser and works out which FIRST, FOLLOW
+and LR(0) state results can be carried over unchanged.
+"""
+
+# Below this share of reusable previous states, a full build is faster than reuse
+MIN_REUSED_FRACTION = 0.75
+
+
+def closure_over(count, seeds, edges):
+    """Returns a list of count flags marking every node reachable from seeds along edges (node -> successors)"""
+    reached = [False] * count
+    pending = list(seeds)
+    for node in pending:
+        reached[node] = True
+    while pending:
+        for successor in edges.get(pending.pop(), ()):
+            if not reached[successor]:
+                reached[successor] = True
+                pending.append(successor)
+    return reached
+
+
+class GrammarDiff:
+    def __init__(self, previous, grammar):
+        self.previous = previous
+        self.grammar = grammar
+        self.first_flags = None
+        self.states = None
+        old = previous.grammar
+
+        old_productions = set(zip((lhs for lhs, _ in old.productions), old.rhs_symbols))
+        new_productions = set(zip((lhs for lhs, _ in grammar.productions), grammar.rhs_symbols))
+        changed_productions = old_productions ^ new_productions
+
+        # Non-terminals whose set of alternatives changed, by id in the new grammar;
+        # non-terminals the previous grammar did not have count as changed too
+        self.changed = [False] * len(grammar.symbols)
+        for lhs, _ in changed_productions:
+            if lhs in grammar.symbol_ids:
+                self.changed[grammar.symbol_ids[lhs]] = True
+        for symbol_id, symbol in enumerate(grammar.symbols):
+            if grammar.is_non_terminal[symbol_id] and not (symbol in old.symbol_ids
+                                                          and old.is_non_terminal[old.symbol_ids[symbol]]):
+                self.changed[symbol_id] = True
+
+        # Symbols on the right of an added or removed production
+        self.touched = set()
+        for _, rhs in changed_productions:
+            for symbol in rhs:
+                if symbol in grammar.symbol_ids:
+                    self.touched.add(grammar.symbol_ids[symbol])
+
+        # Old terminal bit -> new terminal bit; None when the bit layout is unchanged
+        old_terminals = [old.symbols[s] for s in old.terminal_symbols]
+        new_terminals = [grammar.symbols[s] for s in grammar.terminal_symbols]
+        if old_terminals == new_terminals:
+            self.bit_map = None
+        else:
+            self.bit_map = [grammar.terminal_bit[grammar.symbol_ids[t]] if t in grammar.symbol_ids else 0
+                            for t in old_terminals]
+        self.translated_bits = {}  # previous bitset -> translated, as the same sets recur across states
+
+    def old_id(self, symbol_id):
+        return self.previous.grammar.symbol_ids[self.grammar.symbols[symbol_id]]
+
+    def translate_bits(self, bits):
+        """Re-expresses a bitset of the previous grammar over the new grammar's terminals"""
+        if self.bit_map is None:
+            return bits
+        result = self.translated_bits.get(bits)
+        if result is None:
+            result = 0
+            remaining = bits
+            while remaining:
+                low = remaining & -remaining
+                result |= self.bit_map[low.bit_length() - 1]
+                remaining ^= low
+            self.translated_bits[bits] = result
+        return result
+
+    def first_affected(self):
+        """Non-terminals whose nullability or FIRST set may differ: changed ones and everything using them"""
+        if self.first_flags is not None:
+            return self.first_flags
+        grammar = self.grammar
+        users = {}
+        for lhs, rhs in zip(grammar.production_lhs, grammar.production_rhs):
+            for symbol_id in rhs:
+                users.setdefault(symbol_id, set()).add(lhs)
+        seeds = [s for s, changed in enumerate(self.changed) if changed]
+        self.first_flags = closure_over(len(grammar.symbols), seeds, users)
+        return self.first_flags
+
+    def follow_affected(self, nullable):
+        """Non-terminals whose FOLLOW set may differ
+
+        Seeds are symbols on the right of changed productions and symbols
+        followed by something whose FIRST set may have changed; FOLLOW(A)
+        then reaches every B ending a production of A.
+        """
+        grammar = self.grammar
+        is_non_terminal = grammar.is_non_terminal
+        first_affected = self.first_affected()
+        seeds = set(s for s in self.touched if is_non_terminal[s])
+        seeds.update(s for s, changed in enumerate(self.changed) if changed)
+        if self.previous.grammar.start_symbol != grammar.start_symbol:
+            seeds.add(grammar.symbol_ids[grammar.start_symbol])
+
+        flows_into = {}
+        for lhs, rhs in zip(grammar.production_lhs, grammar.production_rhs):
+            rest_affected = False
+            rest_nullable = True
+            for symbol_id in reversed(rhs):
+                if is_non_terminal[symbol_id]:
+                    if rest_affected:
+                        seeds.add(symbol_id)
+                    if rest_nullable:
+                        flows_into.setdefault(lhs, set()).add(symbol_id)
+                rest_affected = rest_affected or first_affected[symbol_id]
+                rest_nullable = rest_nullable and nullable[symbol_id]
+
+        return closure_over(len(grammar.symbols), seeds, flows_into)
+
+    def worth_reusing(self):
+        """Whether at least MIN_REUSED_FRACTION of the previous states survive the edit"""
+        previous = self.previous
+        if getattr(previous, 'check_only', False):
+            return False
+        reusable, _ = self.reusable_states()
+        return len(reusable) >= MIN_REUSED_FRACTION * len(previous.canonical_collection)
+
+    def reusable_states(self):
+        """Maps kernels (as new-grammar item sets) to previous states whose closure and GOTO kernels still hold
+
+        Returns (reusable, translated): reusable maps a kernel to the previous
+        state number; translated maps each previous state to its kernel in
+        the new grammar, or None when one of its productions no longer exists.
+        """
+        if self.states is None:
+            self.states = self.find_reusable_states()
+        return self.states
+
+    def find_reusable_states(self):
+        grammar = self.grammar
+        old = self.previous.grammar
+
+        # A state's closure pulls in the productions of everything reachable
+        # through leftmost non-terminals, so a change anywhere on that path dirties it
+        leftmost_users = {}
+        for lhs, rhs in zip(grammar.production_lhs, grammar.production_rhs):
+            if rhs and grammar.is_non_terminal[rhs[0]]:
+                leftmost_users.setdefault(rhs[0], set()).add(lhs)
+        seeds = [s for s, changed in enumerate(self.changed) if changed]
+        dirty = closure_over(len(grammar.symbols), seeds, leftmost_users)
+
+        new_production = {}
+        for production_id in range(len(grammar.productions)):
+            key = (grammar.productions[production_id][0], grammar.rhs_symbols[production_id])
+            new_production.setdefault(key, production_id)
+        production_map = self.production_map = [new_production.get((lhs, rhs))
+                                                for (lhs, _), rhs in zip(old.productions, old.rhs_symbols)]
+
+        reusable = {}
+        translated = []
+        for old_state, item_set in enumerate(self.previous.canonical_collection):
+            kernel = []
+            clean = True
+            for item in item_set.kernel:
+                production_id = production_map[item.production]
+                if production_id is None:
+                    kernel = None
+                    break
+                new_item = grammar.item(production_id, item.dot_position)
+                kernel.append(new_item)
+
+                # The closure only depends on what follows the dot, so a
+                # changed left-hand side alone does not dirty the state
+                next_symbol = new_item.next_symbol_id
+                if next_symbol is not None and grammar.is_non_terminal[next_symbol] and dirty[next_symbol]:
+                    clean = False
+
+            if kernel is None:
+                translated.append(None)
+                continue
+            kernel = frozenset(kernel)
+            translated.append(kernel)
+            if clean:
+                reusable[kernel] = old_state
+        return reusable, translated
+
+    def action_codes(self, state_map):
+        """Maps the previous tables' action codes to the new ones, given {previous state: new state}"""
+        old = self.previous.grammar
+        production_index = self.grammar.production_index
+        codes = {'acc': 'acc'}
+        for old_id, production_id in enumerate(self.production_map):
+            if production_id is not None and old.production_index[old.productions[old_id]] == old_id:
+                codes[f"r{old_id}"] = f"r{production_index[self.grammar.productions[production_id]]}"
+        for old_state, state in state_map.items():
+            codes[f"s{old_state}"] = f"s{state}"
+        return codes
+
+    def translate_items(self, items):
+        """Returns the new grammar's items for items of a reused state"""
+        translated = (self.grammar.item(self.production_map[item.production], item.dot_position) for item in items)
+        return tuple(sorted(translated, key=lambda item: item.key))
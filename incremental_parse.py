@@ -0,0 +1,684 @@
+"""Incremental re-parsing of edited documents (Wagner and Graham style)
+
+IncrementalParser keeps the parse tree of the last successful parse. Each
+node records the parser state it was shifted in and the number of tokens
+it spans. After an edit, only the nodes whose tokens, or the token right
+after them, changed are broken down. The input to the LR driver is then
+the maximal untouched subtrees left of the edit, the new tokens, and the
+untouched subtrees right of it. An untouched subtree is shifted as a
+single symbol when the parser is in the state it was shifted in before,
+which guarantees the same subtree would be rebuilt.
+
+A chain of left-recursive reductions A -> A α (a list) is kept as a
+Sequence: the list's first element and an AVL-balanced Tail of the α
+parts. A Tail is applied whole when the parser is in the state its parts
+were shifted in, so an edit inside a list breaks down O(log n) nodes
+rather than every element on one side of it. The text is kept in chunks
+of whole tokens with chunk-relative offsets (DocumentText), so an edit
+rewrites only the chunks it touches. The work for an edit therefore
+grows with the edit, the depth of the tree and the log of list lengths,
+not with the document length. Right-recursive lists are the exception:
+their elements left of an edit all sit on the LR stack and are shifted
+again, one subtree each.
+
+Nodes are never modified after they are built, so a failed re-parse
+leaves the last good tree usable: later edits are merged into one
+pending edit against it.
+"""
+import re
+import threading
+import uuid
+from collections import OrderedDict
+
+from parse_tables import ACCEPT, ERROR
+
+TOKEN = re.compile(r'\S+')
+TAIL = -2            # production of Tail nodes
+CHUNK_TOKENS = 256   # tokens per chunk of DocumentText
+
+
+class Node:
+    __slots__ = ('symbol', 'production', 'children', 'length', 'state')
+
+    def __init__(self, symbol, production, children, length, state):
+        self.symbol = symbol            # terminal or the production's left-hand side
+        self.production = production    # -1 for tokens, TAIL for Tail nodes
+        self.children = children
+        self.length = length            # tokens spanned
+        self.state = state              # parser state the node was shifted in
+
+    def to_list(self):
+        """The [symbol, children] form that CompactTable.parse returns for build_tree"""
+        if self.production == -1:
+            return self.symbol
+        root = [self.symbol, []]
+        pending = [(self, root[1])]
+
+        def add(children, out):
+            for child in children:
+                if child.production == -1:
+                    out.append(child.symbol)
+                else:
+                    converted = [child.symbol, []]
+                    out.append(converted)
+                    pending.append((child, converted[1]))
+
+        while pending:
+            node, out = pending.pop()
+            if isinstance(node, Sequence):
+                # Nested back into the A -> A α reductions it stands for, outermost first
+                base, tail = node.children
+                leaves = tail_leaves(tail)
+                for leaf in reversed(leaves[1:]):
+                    inner = [node.symbol, []]
+                    out.append(inner)
+                    add(leaf.children, out)
+                    out = inner[1]
+                add((base,) + leaves[0].children, out)
+            else:
+                add(node.children, out)
+        return root
+
+
+class Sequence(Node):
+    """A list built by A -> A α reductions, as children (first element, Tail of the α parts)"""
+    __slots__ = ()
+
+
+class Tail(Node):
+    """The α parts of a Sequence, AVL-balanced
+
+    A leaf (height 0) has one part's nodes as children; an inner node has
+    two Tails. state is the state every part was shifted in and rule the
+    A -> A α production of the last part.
+    """
+    __slots__ = ('height', 'rule')
+
+    def __init__(self, symbol, children, length, state, height, rule):
+        super().__init__(symbol, TAIL, children, length, state)
+        self.height = height
+        self.rule = rule
+
+
+def tail_pair(left, right):
+    return Tail(left.symbol, (left, right), left.length + right.length, left.state,
+                1 + max(left.height, right.height), right.rule)
+
+
+def balanced_tail(leaves, start=0, end=None):
+    """A perfectly balanced Tail over leaves[start:end]"""
+    if end is None:
+        end = len(leaves)
+    if end - start == 1:
+        return leaves[start]
+    middle = (start + end) // 2
+    return tail_pair(balanced_tail(leaves, start, middle), balanced_tail(leaves, middle, end))
+
+
+def join_tails(left, right):
+    """Concatenates two Tails in O(|height difference|), rotating to keep the result balanced"""
+    if abs(left.height - right.height) <= 1:
+        return tail_pair(left, right)
+    if left.height > right.height:
+        outer, inner = left.children
+        joined = join_tails(inner, right)
+        if joined.height <= outer.height + 1:
+            return tail_pair(outer, joined)
+        middle, last = joined.children
+        if middle.height <= last.height:
+            return tail_pair(tail_pair(outer, middle), last)
+        return tail_pair(tail_pair(outer, middle.children[0]), tail_pair(middle.children[1], last))
+    inner, outer = right.children
+    joined = join_tails(left, inner)
+    if joined.height <= outer.height + 1:
+        return tail_pair(joined, outer)
+    first, middle = joined.children
+    if middle.height <= first.height:
+        return tail_pair(first, tail_pair(middle, outer))
+    return tail_pair(tail_pair(first, middle.children[0]), tail_pair(middle.children[1], outer))
+
+
+def tail_leaves(tail):
+    """The leaves of a Tail, left to right"""
+    leaves = []
+    pending = [tail]
+    while pending:
+        node = pending.pop()
+        if node.height:
+            pending.extend(reversed(node.children))
+        else:
+            leaves.append(node)
+    return leaves
+
+
+def close_sequence(node, left_recursive):
+    """Turns a chain of plain A -> A α nodes into a Sequence; any other node is returned as it is
+
+    A chain that bottoms out in a Sequence of the same symbol is joined onto it.
+    """
+    if node.production < 0 or not left_recursive[node.production] or isinstance(node, Sequence):
+        return node
+    symbol = node.symbol
+    leaves = []
+    inner = node
+    while (inner.production >= 0 and left_recursive[inner.production] and inner.symbol == symbol
+           and not isinstance(inner, Sequence)):
+        parts = inner.children[1:]
+        leaves.append(Tail(symbol, parts, inner.length - inner.children[0].length, parts[0].state, 0,
+                           inner.production))
+        inner = inner.children[0]
+    leaves.reverse()
+    tail = balanced_tail(leaves)
+    if isinstance(inner, Sequence) and inner.symbol == symbol:
+        inner, earlier = inner.children
+        tail = join_tails(earlier, tail)
+    return Sequence(symbol, node.production, (inner, tail), node.length, node.state)
+
+
+def extend_sequence(node, tail, left_recursive):
+    """The list node that results from applying tail after node"""
+    node = close_sequence(node, left_recursive)
+    if isinstance(node, Sequence) and node.symbol == tail.symbol:
+        base, earlier = node.children
+        tail = join_tails(earlier, tail)
+    else:
+        base = node
+    return Sequence(tail.symbol, tail.rule, (base, tail), base.length + tail.length, node.state)
+
+
+def first_token(node):
+    """The leftmost token under a node, or None if it spans no tokens"""
+    while node.production != -1:
+        if not node.length:
+            return None
+        node = next(child for child in node.children if child.length)
+    return node
+
+
+def edit_stream(tree, start, end, new_tokens):
+    """Breaks the tree down around an edit replacing its tokens [start, end)
+
+    Returns the parser input as a list of nodes: whole subtrees that end
+    before the token at start, the new token nodes, and whole subtrees
+    that start at or after end. A subtree ending right at start is broken
+    down too, since the token after it (its last lookahead) changed.
+    """
+    left = []
+    right = []
+    pending = [(tree, 0)]
+    while pending:
+        node, offset = pending.pop()
+        node_end = offset + node.length
+        if node_end < start or (node.production == -1 and node_end == start):
+            left.append(node)
+        elif offset >= end:
+            right.append(node)
+        elif node.production != -1:
+            # Children are pushed right to left so they come off the stack in order
+            child_end = node_end
+            for child in reversed(node.children):
+                child_end -= child.length
+                pending.append((child, child_end))
+    return left + [Node(token, -1, (), 1, -1) for token in new_tokens] + right
+
+
+class Sizes:
+    """Sizes of a list of chunks in a Fenwick tree: prefix sums and position lookups in O(log n)"""
+
+    def __init__(self, sizes):
+        tree = [0]
+        tree.extend(sizes)
+        for index in range(1, len(tree)):
+            parent = index + (index & -index)
+            if parent < len(tree):
+                tree[parent] += tree[index]
+        self.tree = tree
+        self.total = sum(sizes)
+
+    def add(self, chunk, delta):
+        self.total += delta
+        index = chunk + 1
+        while index < len(self.tree):
+            self.tree[index] += delta
+            index += index & -index
+
+    def before(self, chunk):
+        """Total size of the chunks before chunk"""
+        total = 0
+        while chunk:
+            total += self.tree[chunk]
+            chunk -= chunk & -chunk
+        return total
+
+    def find(self, position):
+        """(chunk, total size before it) for the chunk holding position, which must be below total"""
+        tree = self.tree
+        chunk = 0
+        before = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            index = chunk + step
+            if index < len(tree) and before + tree[index] <= position:
+                chunk = index
+                before += tree[index]
+            step >>= 1
+        return chunk, before
+
+
+def split_chunks(text, tokens, offsets, count=None):
+    """Cuts text and its tokens (offsets into text) into count even chunks, by default of at most CHUNK_TOKENS
+
+    Every chunk but the first starts at a token, so no token crosses a chunk boundary.
+    """
+    if count is None:
+        count = -(-len(tokens) // CHUNK_TOKENS)
+    # Chunk sizes differ by at most one token, and no chunk is left without tokens
+    count = max(1, min(count, len(tokens)))
+    texts = []
+    token_lists = []
+    offset_lists = []
+    for index in range(count):
+        first = index * len(tokens) // count
+        last = (index + 1) * len(tokens) // count
+        char_start = offsets[first] if index else 0
+        char_end = offsets[last] if last < len(tokens) else len(text)
+        texts.append(text[char_start:char_end])
+        token_lists.append(tokens[first:last])
+        offset_lists.append([offset - char_start for offset in offsets[first:last]])
+    return texts, token_lists, offset_lists
+
+
+class DocumentText:
+    """A document's text and tokens, in chunks of whole tokens with offsets relative to each chunk
+
+    Token and character positions are found through Sizes over the chunks,
+    so an edit rewrites the chunks it touches, not the whole text.
+    """
+
+    def __init__(self, text='', tokens=None, offsets=None):
+        if tokens is None:
+            matches = list(TOKEN.finditer(text))
+            tokens = [match.group() for match in matches]
+            offsets = [match.start() for match in matches]
+        self.texts, self.tokens, self.offsets = split_chunks(text, tokens, offsets)
+        self.index()
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        """A document of the tokens separated by single spaces"""
+        offsets = []
+        offset = 0
+        for token in tokens:
+            offsets.append(offset)
+            offset += len(token) + 1
+        return cls(' '.join(tokens), tokens, offsets)
+
+    def index(self):
+        self.token_sizes = Sizes([len(tokens) for tokens in self.tokens])
+        self.char_sizes = Sizes([len(text) for text in self.texts])
+
+    @property
+    def token_count(self):
+        return self.token_sizes.total
+
+    @property
+    def length(self):
+        return self.char_sizes.total
+
+    @property
+    def text(self):
+        return ''.join(self.texts)
+
+    def token(self, index):
+        chunk, before = self.token_sizes.find(index)
+        return self.tokens[chunk][index - before]
+
+    def token_range(self, start, end):
+        """Tokens [start, end) as a list"""
+        if start >= end:
+            return []
+        chunk, before = self.token_sizes.find(start)
+        result = []
+        while before < end:
+            tokens = self.tokens[chunk]
+            result.extend(tokens[max(start - before, 0):end - before])
+            before += len(tokens)
+            chunk += 1
+        return result
+
+    def region(self, first, stop):
+        """Text, tokens and offsets of chunks [first, stop) joined together"""
+        tokens = []
+        offsets = []
+        shift = 0
+        for chunk in range(first, stop):
+            tokens.extend(self.tokens[chunk])
+            offsets.extend(offset + shift for offset in self.offsets[chunk])
+            shift += len(self.texts[chunk])
+        return ''.join(self.texts[first:stop]), tokens, offsets
+
+    def replace_tokens(self, start, end, new_tokens):
+        """Replaces tokens [start, end); new tokens are separated by single spaces"""
+        count = self.token_count
+        first = self.token_sizes.find(start)[0] if start < count else len(self.texts) - 1
+        stop = self.token_sizes.find(end - 1)[0] + 1 if end > start else first + 1
+        text, tokens, offsets = self.region(first, stop)
+        start -= self.token_sizes.before(first)
+        end -= self.token_sizes.before(first)
+
+        inserted = ' '.join(new_tokens)
+        if end > start:
+            char_start = offsets[start]
+            char_end = offsets[end - 1] + len(tokens[end - 1])
+        elif start < len(tokens):
+            char_start = char_end = offsets[start]
+            if new_tokens:
+                inserted += ' '
+        else:
+            char_start = char_end = len(text)
+            if new_tokens and self.length:
+                inserted = ' ' + inserted
+
+        new_offsets = []
+        offset = char_start + (1 if inserted.startswith(' ') else 0)
+        for token in new_tokens:
+            new_offsets.append(offset)
+            offset += len(token) + 1
+        delta = len(inserted) - (char_end - char_start)
+        self.rewrite(first, stop, text[:char_start] + inserted + text[char_end:],
+                     tokens[:start] + list(new_tokens) + tokens[end:],
+                     offsets[:start] + new_offsets + [offset + delta for offset in offsets[end:]])
+
+    def replace_text(self, start, end, replacement):
+        """Replaces characters [start, end) and re-tokenizes the chunks around them
+
+        Returns (first, last, new_tokens): tokens [first, last) of the old
+        document were replaced by new_tokens.
+        """
+        # The chunks holding the characters just before and at the edit, since it can join tokens across it
+        first = self.char_sizes.find(start - 1)[0] if start else 0
+        stop = self.char_sizes.find(end)[0] + 1 if end < self.length else len(self.texts)
+        text, old_tokens, _ = self.region(first, stop)
+        char_base = self.char_sizes.before(first)
+        text = text[:start - char_base] + replacement + text[end - char_base:]
+        matches = list(TOKEN.finditer(text))
+        tokens = [match.group() for match in matches]
+        token_base = self.token_sizes.before(first)
+        self.rewrite(first, stop, text, tokens, [match.start() for match in matches])
+
+        # Only the tokens that differ are reported as edited
+        limit = min(len(old_tokens), len(tokens))
+        prefix = 0
+        while prefix < limit and old_tokens[prefix] == tokens[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old_tokens[-1 - suffix] == tokens[-1 - suffix]:
+            suffix += 1
+        return token_base + prefix, token_base + len(old_tokens) - suffix, tokens[prefix:len(tokens) - suffix]
+
+    def rewrite(self, first, stop, text, tokens, offsets):
+        # Replaces chunks [first, stop) with the given region, re-cut into chunks
+        if len(tokens) < CHUNK_TOKENS // 2 and stop < len(self.texts):
+            # Too small to stand alone: merged with the next chunk
+            shift = len(text)
+            text += self.texts[stop]
+            tokens = tokens + self.tokens[stop]
+            offsets = offsets + [offset + shift for offset in self.offsets[stop]]
+            stop += 1
+        # The region keeps its number of chunks while they stay between half and twice CHUNK_TOKENS,
+        # so the Sizes are only rebuilt when the chunk count changes
+        count = stop - first
+        if not CHUNK_TOKENS // 2 * count <= len(tokens) <= 2 * CHUNK_TOKENS * count:
+            count = None
+        texts, token_lists, offset_lists = split_chunks(text, tokens, offsets, count)
+        if len(texts) != stop - first:
+            self.texts[first:stop] = texts
+            self.tokens[first:stop] = token_lists
+            self.offsets[first:stop] = offset_lists
+            self.index()
+            return
+        for chunk, (chunk_text, chunk_tokens, chunk_offsets) in enumerate(zip(texts, token_lists, offset_lists),
+                                                                          first):
+            self.token_sizes.add(chunk, len(chunk_tokens) - len(self.tokens[chunk]))
+            self.char_sizes.add(chunk, len(chunk_text) - len(self.texts[chunk]))
+            self.texts[chunk] = chunk_text
+            self.tokens[chunk] = chunk_tokens
+            self.offsets[chunk] = chunk_offsets
+
+
+class IncrementalParser:
+    """Parses a document with a compiled grammar's tables and re-parses it after each edit
+
+    parser is an SLRParser or a stored grammar. Edits are given in tokens
+    (edit) or in characters of the document text (edit_text); results have
+    the same form as CompactTable.parse.
+    """
+
+    def __init__(self, parser):
+        table = self.table = parser.get_compact_table()
+        # '$' is only the end marker: a literal '$' in the text is an unknown token
+        self.token_columns = {t: i for t, i in table.terminal_index.items() if t != '$'}
+        self.left_recursive = [length >= 2 and rhs.split()[0] == lhs
+                               for (lhs, rhs), length in zip(table.productions, table.production_length)]
+        self.document = DocumentText()
+        self.tree = None     # last successful parse
+        self.pending = None  # (shared prefix, shared suffix) of tree's tokens and the document's, when they differ
+        self.tree_length = 0
+        self.stats = {}
+        self.lock = threading.Lock()  # held while a document store request edits this document
+
+    @property
+    def text(self):
+        return self.document.text
+
+    def parse_text(self, text, build_tree=False):
+        """Parses a whole document, discarding any earlier tree"""
+        self.document = DocumentText(text)
+        return self.parse_document(build_tree)
+
+    def parse(self, tokens, build_tree=False):
+        """Parses a whole token list from scratch"""
+        if isinstance(tokens, str):
+            tokens = tokens.split()
+        self.document = DocumentText.from_tokens(list(tokens))
+        return self.parse_document(build_tree)
+
+    def parse_document(self, build_tree):
+        self.tree = None
+        self.pending = None
+        tokens = self.document.token_range(0, self.document.token_count)
+        return self.run([Node(token, -1, (), 1, -1) for token in tokens], build_tree)
+
+    def edit(self, start, end, new_tokens, build_tree=False):
+        """Replaces tokens [start, end) with new_tokens and re-parses"""
+        count = self.document.token_count
+        if not 0 <= start <= end <= count:
+            raise ValueError(f"Edit range {start}-{end} is outside the document's {count} tokens")
+        new_tokens = list(new_tokens)
+        self.document.replace_tokens(start, end, new_tokens)
+        return self.reparse(start, end, len(new_tokens), build_tree)
+
+    def edit_text(self, start, end, replacement, build_tree=False):
+        """Replaces characters [start, end) of the document text and re-parses the tokens that changed"""
+        length = self.document.length
+        if not 0 <= start <= end <= length:
+            raise ValueError(f"Edit range {start}-{end} is outside the document's {length} characters")
+        start, end, new_tokens = self.document.replace_text(start, end, replacement)
+        return self.reparse(start, end, len(new_tokens), build_tree)
+
+    def reparse(self, start, end, inserted, build_tree):
+        """Re-parses after the document's tokens [start, end) were replaced by `inserted` new ones"""
+        if self.tree is None:
+            return self.parse_document(build_tree)
+        count = self.document.token_count
+        old_count = count - inserted + end - start
+
+        # Merge with an edit left over from a failed re-parse: the tree's
+        # tokens and the current ones share a prefix and a suffix
+        prefix, suffix = self.pending if self.pending is not None else (old_count, old_count)
+        prefix = min(prefix, start)
+        suffix = min(suffix, old_count - end)
+        self.pending = (prefix, suffix)
+        stream = edit_stream(self.tree, prefix, self.tree_length - suffix,
+                             self.document.token_range(prefix, count - suffix))
+        return self.run(stream, build_tree)
+
+    def run(self, stream, build_tree):
+        """The LR driver over a stream of token nodes and reusable subtrees"""
+        table = self.table
+        token_columns = self.token_columns
+        end_column = table.terminal_index.get('$', -1)
+        action_base = table.action_base
+        action_values = table.action_values
+        action_check = table.action_check
+        check_length = len(action_check)
+        default_reduction = table.default_reduction
+        production_lhs = table.production_lhs
+        production_length = table.production_length
+        productions = table.productions
+        left_recursive = self.left_recursive
+
+        end = Node('$', -1, (), 0, -1)
+        stream.append(end)
+        stream.reverse()
+        states = [0]
+        nodes = []
+        position = 0
+        reductions = 0
+        reused = 0
+        shifted = 0
+        stream_size = len(stream)
+
+        state_count = len(default_reduction)
+        pending_reductions = 0
+        reduction_limit = state_count * (state_count + 1)
+
+        while True:
+            state = states[-1]
+            lookahead = stream[-1]
+
+            if lookahead.production != -1:
+                if lookahead.state == state:
+                    stream.pop()
+                    if lookahead.production == TAIL:
+                        # The list on top of the stack takes the parts whole and stays in this state
+                        nodes[-1] = extend_sequence(nodes[-1], lookahead, left_recursive)
+                    else:
+                        # An untouched subtree shifted in this same state is reused whole
+                        states.append(table.goto(state, production_lhs[lookahead.production]))
+                        nodes.append(lookahead)
+                    position += lookahead.length
+                    reused += 1
+                    pending_reductions = 0
+                    continue
+                token = first_token(lookahead)
+                column = token_columns.get(token.symbol, -1) if token is not None else -1
+            elif lookahead is end:
+                column = end_column
+            else:
+                column = token_columns.get(lookahead.symbol, -1)
+
+            if column < 0:
+                code = ERROR
+            else:
+                slot = action_base[state] + column
+                if slot < check_length and action_check[slot] == state:
+                    code = action_values[slot]
+                else:
+                    code = default_reduction[state]
+
+            if lookahead.production != -1 and code >= ACCEPT:
+                # Not reducing before this subtree: look inside it instead
+                stream.pop()
+                stream.extend(reversed(lookahead.children))
+                stream_size += len(lookahead.children)
+                continue
+
+            if code > 0:
+                stream.pop()
+                states.append(code - 1)
+                nodes.append(Node(lookahead.symbol, -1, (), 1, state))
+                position += 1
+                shifted += 1
+                pending_reductions = 0
+                reduction_limit = state_count * (len(states) + state_count)
+
+            elif code == ACCEPT and lookahead is end:
+                self.tree = close_sequence(nodes[-1], left_recursive) if nodes else None
+                self.tree_length = self.document.token_count
+                self.pending = None
+                self.stats = {'stream_nodes': stream_size, 'reused_subtrees': reused,
+                              'shifted_tokens': shifted, 'reductions': reductions}
+                result = {'accepted': True, 'reductions': reductions}
+                if build_tree:
+                    result['tree'] = self.tree.to_list() if self.tree is not None else None
+                return result
+
+            elif code < ACCEPT:
+                production = -code - 1
+                length = production_length[production]
+                symbol = productions[production][0]
+                children = tuple(nodes[len(nodes) - length:]) if length else ()
+                if length:
+                    del nodes[-length:]
+                    del states[-length:]
+                    # A list stays open while A -> A α reductions extend it; used in anything else, it is closed
+                    open_list = 1 if left_recursive[production] and children[0].symbol == symbol else 0
+                    if any(child.production >= 0 and left_recursive[child.production] and type(child) is Node
+                           for child in children[open_list:]):
+                        children = children[:open_list] + tuple(close_sequence(child, left_recursive)
+                                                                for child in children[open_list:])
+                below = states[-1]
+                nodes.append(Node(symbol, production, children, sum(child.length for child in children), below))
+                states.append(table.goto(below, production_lhs[production]))
+                reductions += 1
+                pending_reductions += 1
+                if pending_reductions > reduction_limit:
+                    return self.failed(position, [], reused, shifted, reductions, stream_size, 'reduction cycle')
+
+            else:
+                return self.failed(position, table.expected_terminals(state), reused, shifted, reductions,
+                                   stream_size)
+
+    def failed(self, position, expected, reused, shifted, reductions, stream_size, error=None):
+        # The last good tree is kept; self.pending already describes how the tokens moved on from it
+        self.stats = {'stream_nodes': stream_size, 'reused_subtrees': reused,
+                      'shifted_tokens': shifted, 'reductions': reductions}
+        result = {
+            'accepted': False,
+            'position': position,
+            'token': self.document.token(position) if position < self.document.token_count else '$',
+            'expected': expected
+        }
+        if error is not None:
+            result['error'] = error
+        return result
+
+
+class DocumentStore:
+    """Open documents by id, each with its IncrementalParser; the least recently used are closed past `limit`"""
+
+    def __init__(self, limit=256):
+        self.limit = limit
+        self.documents = OrderedDict()  # document id -> IncrementalParser, least recently used first
+        self.lock = threading.Lock()
+
+    def open(self, parser):
+        document = IncrementalParser(parser)
+        document_id = uuid.uuid4().hex
+        with self.lock:
+            self.documents[document_id] = document
+            while len(self.documents) > self.limit:
+                self.documents.popitem(last=False)
+        return document_id, document
+
+    def get(self, document_id):
+        with self.lock:
+            document = self.documents.get(document_id)
+            if document is not None:
+                self.documents.move_to_end(document_id)
+            return document
+
+    def close(self, document_id):
+        with self.lock:
+            return self.documents.pop(document_id, None)
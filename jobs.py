@@ -0,0 +1,224 @@
+"""Background compilation of large grammars in a bounded set of worker processes
+
+Each job runs SLRParser in its own process so it can be limited in memory
+and CPU time, killed on cancellation or timeout, and cannot stall the web
+tier. Phase progress and the finished parser come back over a pipe.
+"""
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; only the wall-clock limit applies there
+    resource = None
+
+from slr_parser import SLRParser
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+TIMED_OUT = 'timeout'
+FINISHED = (DONE, FAILED, CANCELLED, TIMED_OUT)
+
+
+def run_job(conn, grammar_text, mode, reduction, time_limit, memory_limit):
+    """Worker process entry point: applies the limits, then sends phase progress and the parser back"""
+    if resource is not None:
+        if memory_limit:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+        if time_limit:
+            cpu_seconds = int(time_limit) + 1
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+
+    try:
+        parser = SLRParser(grammar_text, profile=True, mode=mode, reduction=reduction,
+                           progress=lambda phase, seconds: conn.send(('phase', phase, seconds)))
+
+        # The listener holds the pipe and cannot be pickled with the parser
+        parser.stats.listener = None
+        conn.send(('done', parser))
+    except MemoryError:
+        conn.send(('error', 'Memory limit exceeded'))
+    except Exception as e:
+        conn.send(('error', str(e)))
+    finally:
+        conn.close()
+
+
+class Job:
+    def __init__(self, grammar_text, mode, reduction='none'):
+        self.id = uuid.uuid4().hex
+        self.grammar_text = grammar_text
+        self.mode = mode
+        self.reduction = reduction
+        self.status = QUEUED
+        self.phase = None     # phase currently running in the worker
+        self.phases = {}      # finished phase -> milliseconds
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = False
+        self.version = 0      # bumped on every change so watchers can wait for the next one
+
+    def to_dict(self):
+        data = {
+            'id': self.id,
+            'status': self.status,
+            'mode': self.mode,
+            'reduction': self.reduction,
+            'phase': self.phase,
+            'phases_ms': dict(self.phases),
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished
+        }
+        if self.status == DONE:
+            data['result'] = self.result
+        if self.error is not None:
+            data['error'] = self.error
+        return data
+
+
+class JobManager:
+    """Runs jobs in at most `workers` processes at a time and keeps the last `history` jobs"""
+
+    def __init__(self, workers=2, time_limit=60, memory_limit=1024 * 1024 * 1024, history=256):
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
+        self.history = history
+        self.context = multiprocessing.get_context('spawn')
+        self.slots = threading.BoundedSemaphore(workers)
+        self.jobs = OrderedDict()  # job id -> Job, oldest first
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+
+    def submit(self, grammar_text, mode='slr', on_done=None, reduction='none'):
+        """Queues a job; on_done(parser) runs in this process when it succeeds and its return value becomes the result"""
+        job = Job(grammar_text, mode, reduction)
+        with self.lock:
+            self.jobs[job.id] = job
+            self.prune()
+        threading.Thread(target=self.run, args=(job, on_done), daemon=True).start()
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Requests cancellation; a queued job is cancelled at once and a running one is killed"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return job
+            job.cancel_requested = True
+            if job.status == QUEUED:
+                self.set_status(job, CANCELLED)
+            return job
+
+    def wait(self, job, version, timeout=None):
+        """Blocks until the job changes from the given version or the timeout passes; returns its snapshot and version"""
+        with self.changed:
+            self.changed.wait_for(lambda: job.version != version, timeout)
+            return job.to_dict(), job.version
+
+    def update(self, job, **changes):
+        with self.lock:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            job.version += 1
+            self.changed.notify_all()
+
+    def set_status(self, job, status, error=None):
+        # Caller holds the lock
+        job.status = status
+        job.error = error
+        job.phase = None
+        if status in FINISHED:
+            job.finished = time.time()
+        job.version += 1
+        self.changed.notify_all()
+
+    def prune(self):
+        # Caller holds the lock; only finished jobs are forgotten
+        excess = len(self.jobs) - self.history
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.status in FINISHED][:max(excess, 0)]:
+            del self.jobs[job_id]
+
+    def run(self, job, on_done):
+        with self.slots:
+            with self.lock:
+                if job.cancel_requested:
+                    return
+                job.status = RUNNING
+                job.started = time.time()
+                job.version += 1
+                self.changed.notify_all()
+
+            receiver, sender = self.context.Pipe(duplex=False)
+            process = self.context.Process(target=run_job, daemon=True,
+                                           args=(sender, job.grammar_text, job.mode, job.reduction,
+                                                 self.time_limit, self.memory_limit))
+            try:
+                process.start()
+                sender.close()
+                status, value = self.follow(job, process, receiver, time.monotonic() + self.time_limit)
+            except Exception as e:
+                status, value = FAILED, f"Could not run job: {e}"
+            finally:
+                sender.close()
+                receiver.close()
+                if process.is_alive():
+                    process.terminate()
+                if process.pid is not None:
+                    process.join()
+
+        if status == DONE:
+            try:
+                result = on_done(value) if on_done is not None else None
+            except Exception as e:
+                status, value = FAILED, str(e)
+            else:
+                self.update(job, result=result)
+
+        with self.lock:
+            self.set_status(job, status, None if status == DONE else value)
+
+    def follow(self, job, process, receiver, deadline):
+        """Relays worker messages until the job finishes, is cancelled or runs out of time
+
+        Returns (status, parser) on success and (status, error message) otherwise.
+        """
+        while True:
+            if job.cancel_requested:
+                return CANCELLED, 'Cancelled'
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return TIMED_OUT, f"Time limit of {self.time_limit}s exceeded"
+            if not receiver.poll(min(remaining, 0.1)):
+                continue
+
+            try:
+                message = receiver.recv()
+            except EOFError:
+                # The worker died without reporting, e.g. killed by its CPU limit
+                process.join(1)
+                return FAILED, f"Worker exited unexpectedly (exit code {process.exitcode})"
+
+            if message[0] == 'phase':
+                _, phase, seconds = message
+                if seconds is None:
+                    self.update(job, phase=phase)
+                else:
+                    self.update(job, phase=None, phases=dict(job.phases, **{phase: round(seconds * 1000, 3)}))
+            elif message[0] == 'done':
+                return DONE, message[1]
+            else:
+                return FAILED, message[1]
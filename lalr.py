@@ -0,0 +1,135 @@
+"""LALR(1) lookaheads over the LR(0) canonical collection (DeRemer and Pennello)
+
+Lookaheads are found from the non-terminal transitions of the LR(0)
+automaton with two relation closures (reads, then includes) instead of
+building LR(1) states and merging them. All sets are int bitsets over
+grammar.terminal_symbols.
+"""
+
+
+def digraph(count, edges, bits):
+    """Closes bits over the edge relation: F(x) = bits(x) ∪ ⋃{F(y) | x -> y}
+
+    Iterative form of DeRemer and Pennello's traversal; every strongly
+    connected component ends up sharing one set. Updates bits in place.
+    """
+    finished = count + 1
+    depth = [0] * count
+    stack = []
+    for root in range(count):
+        if depth[root]:
+            continue
+
+        # Each frame is (node, iterator over its successors, its stack depth)
+        stack.append(root)
+        depth[root] = len(stack)
+        frames = [(root, iter(edges[root]), len(stack))]
+        while frames:
+            node, successors, node_depth = frames[-1]
+            descended = False
+            for successor in successors:
+                if depth[successor] == 0:
+                    stack.append(successor)
+                    depth[successor] = len(stack)
+                    frames.append((successor, iter(edges[successor]), len(stack)))
+                    descended = True
+                    break
+                depth[node] = min(depth[node], depth[successor])
+                bits[node] |= bits[successor]
+            if descended:
+                continue
+
+            frames.pop()
+
+            # node is the root of a component: pop it and share its set
+            if depth[node] == node_depth:
+                while True:
+                    member = stack.pop()
+                    depth[member] = finished
+                    bits[member] = bits[node]
+                    if member == node:
+                        break
+
+            if frames:
+                parent = frames[-1][0]
+                depth[parent] = min(depth[parent], depth[node])
+                bits[parent] |= bits[node]
+    return bits
+
+
+def compute_lookaheads(parser):
+    """Returns {(state, production id): lookahead bitset} for every reduction in the collection"""
+    grammar = parser.grammar
+    is_non_terminal = grammar.is_non_terminal
+    symbol_ids = grammar.symbol_ids
+    collection = parser.canonical_collection
+
+    # Transitions by symbol id, and an index for every non-terminal transition (p, A)
+    transitions = [{symbol_ids[symbol]: target for symbol, target in item_set.transitions.items()}
+                   for item_set in collection]
+    transition_index = {}
+    transition_list = []
+    for state, targets in enumerate(transitions):
+        for symbol_id in sorted(targets):
+            if is_non_terminal[symbol_id]:
+                transition_index[(state, symbol_id)] = len(transition_list)
+                transition_list.append((state, symbol_id))
+
+    # DR(p, A): terminals shifted right after the transition; reads (p, A) -> (r, C)
+    # for nullable C leaving r = goto(p, A)
+    terminal_bit = grammar.terminal_bit
+    read_bits = []
+    reads = []
+    for state, symbol_id in transition_list:
+        target = transitions[state][symbol_id]
+        direct = 0
+        edges = []
+        for next_symbol, _ in transitions[target].items():
+            if not is_non_terminal[next_symbol]:
+                direct |= terminal_bit[next_symbol]
+            elif parser.nullable[next_symbol]:
+                edges.append(transition_index[(target, next_symbol)])
+        read_bits.append(direct)
+        reads.append(edges)
+
+    # The augmented start production has no end-marker of its own, so $ follows the start transition
+    start_transition = transition_index[(0, grammar.production_rhs[0][0])]
+    read_bits[start_transition] |= terminal_bit[symbol_ids['$']]
+
+    read_bits = digraph(len(transition_list), reads, read_bits)
+
+    # includes (r, X) -> (p, B) for B -> βXγ with γ nullable and p --β--> r;
+    # lookback (q, B -> ω) -> (p, B) for p --ω--> q
+    # included[p][i]: rhs[i] of production p is a non-terminal and rhs[i + 1:] can derive ε.
+    # It only depends on the production, not the transition, so it is worked out once
+    included = []
+    for rhs in grammar.production_rhs:
+        flags = [False] * len(rhs)
+        rest_nullable = True
+        for i in range(len(rhs) - 1, -1, -1):
+            flags[i] = rest_nullable and is_non_terminal[rhs[i]]
+            rest_nullable = rest_nullable and parser.nullable[rhs[i]]
+        included.append(flags)
+
+    includes = [[] for _ in transition_list]
+    lookback = {}
+    for index, (state, lhs) in enumerate(transition_list):
+        for production_id in grammar.productions_by_lhs[lhs]:
+            rhs = grammar.production_rhs[production_id]
+            flags = included[production_id]
+            current = state
+            for i, symbol_id in enumerate(rhs):
+                if flags[i]:
+                    includes[transition_index[(current, symbol_id)]].append(index)
+                current = transitions[current][symbol_id]
+            lookback.setdefault((current, production_id), []).append(index)
+
+    follow_bits = digraph(len(transition_list), includes, read_bits)
+
+    lookaheads = {}
+    for key, indexes in lookback.items():
+        bits = 0
+        for index in indexes:
+            bits |= follow_bits[index]
+        lookaheads[key] = bits
+    return lookaheads
@@ -0,0 +1,272 @@
+from array import array
+
+# Action codes: 0 is an error, a positive code n shifts to state n - 1 and
+# a negative code -n reduces by production n - 1. Production 0 is the
+# augmented start production, so reducing by it means accept.
+ERROR = 0
+ACCEPT = -1
+
+
+def encode_action(action):
+    if not action:
+        return ERROR
+    if action == 'acc':
+        return ACCEPT
+    if action[0] == 's':
+        return int(action[1:]) + 1
+    return -(int(action[1:]) + 1)
+
+
+def decode_action(code):
+    if code == ERROR:
+        return ''
+    if code == ACCEPT:
+        return 'acc'
+    if code > 0:
+        return f"s{code - 1}"
+    return f"r{-code - 1}"
+
+
+def pack_rows(rows, width):
+    """Row-displacement (comb) packing of sparse rows into flat value/check arrays
+
+    Each row is a dict column -> value. Row r is stored at base[r] + column,
+    and check[base[r] + column] == r marks the slot as belonging to row r.
+    Dense rows are placed first since they are the hardest to fit.
+    """
+    base = array('i', [0] * len(rows))
+    values = array('i')
+    check = array('i')
+    occupied = 0      # bitset of used slots
+    lowest_free = 0   # every slot below this one is used
+
+    for row_index in sorted(range(len(rows)), key=lambda r: -len(rows[r])):
+        row = rows[row_index]
+        if not row:
+            continue
+        columns = sorted(row)
+
+        # Displacement d is blocked when slot d + column is used for some
+        # column, so the first fit is the lowest clear bit of the union of
+        # the used slots shifted down by each column. Slots below
+        # lowest_free are all used, so the search starts there
+        start = max(0, lowest_free - columns[0])
+        window = occupied >> start
+        blocked = 0
+        for column in columns:
+            blocked |= window >> column
+        displacement = start + (~blocked & (blocked + 1)).bit_length() - 1
+
+        # Grow the arrays so every column of the row can be indexed directly
+        end = displacement + width
+        if end > len(values):
+            grow = end - len(values)
+            values.extend([0] * grow)
+            check.extend([-1] * grow)
+
+        mask = 0
+        for column in columns:
+            slot = displacement + column
+            mask |= 1 << column
+            values[slot] = row[column]
+            check[slot] = row_index
+        occupied |= mask << displacement
+        if occupied >> lowest_free & 1:
+            free = ~(occupied >> lowest_free)
+            lowest_free += (free & -free).bit_length() - 1
+        base[row_index] = displacement
+
+    return base, values, check
+
+
+class CompactTable:
+    """Array-encoded ACTION/GOTO tables and a table-driven parse loop"""
+
+    # The int arrays that make up a table
+    ARRAYS = ('action_base', 'action_values', 'action_check', 'default_reduction',
+              'goto_base', 'goto_values', 'goto_check', 'production_lhs', 'production_length',
+              'default_offsets', 'default_columns')
+
+    def __init__(self, parser):
+        grammar = parser.grammar
+        self.terminals = sorted(parser.terminals)
+        self.non_terminals = sorted(nt for nt in parser.non_terminals if nt != grammar.start_symbol)
+        self.terminal_index = {t: i for i, t in enumerate(self.terminals)}
+        self.non_terminal_index = {nt: i for i, nt in enumerate(self.non_terminals)}
+
+        # Per-production data needed by reductions
+        self.production_lhs = array('i', [self.non_terminal_index.get(lhs, -1) for lhs, _ in grammar.productions])
+        self.production_length = array('i', [len(rhs) for rhs in grammar.rhs_symbols])
+        self.productions = grammar.productions
+
+        # Unit reduction states skipped by the parser's GOTO redirects get no
+        # row; the remaining states are renumbered densely
+        skipped = set(parser.skipped_states)
+        states = [state for state in range(len(parser.action_table)) if state not in skipped]
+        number = {state: index for index, state in enumerate(states)} if skipped else None
+        redirects = parser.unit_redirects
+        action_rows = []
+        goto_rows = []
+        self.default_reduction = array('i', [ERROR] * len(states))
+        # Columns each state's default reduction replaced, as offsets into default_columns
+        self.default_offsets = array('i', [0])
+        self.default_columns = array('i')
+
+        for index, state in enumerate(states):
+            row = {self.terminal_index[terminal]: encode_action(action)
+                   for terminal, action in parser.action_table[state].items()}
+            if number is not None:
+                row = {column: number[code - 1] + 1 if code > 0 else code for column, code in row.items()}
+
+            # The most frequent reduction becomes the state's default and is
+            # dropped from the row; accept is never a default
+            reductions = {}
+            for code in row.values():
+                if code < ACCEPT:
+                    reductions[code] = reductions.get(code, 0) + 1
+            if reductions:
+                default = max(sorted(reductions), key=lambda code: reductions[code])
+                self.default_reduction[index] = default
+                self.default_columns.extend(sorted(column for column, code in row.items() if code == default))
+                row = {column: code for column, code in row.items() if code != default}
+            self.default_offsets.append(len(self.default_columns))
+            action_rows.append(row)
+
+            gotos = {self.non_terminal_index[nt]: redirects.get((state, nt), target)
+                     for nt, target in parser.goto_table[state].items()}
+            if number is not None:
+                gotos = {column: number[target] for column, target in gotos.items()}
+            goto_rows.append(gotos)
+
+        self.action_base, self.action_values, self.action_check = pack_rows(action_rows, len(self.terminals))
+        self.goto_base, self.goto_values, self.goto_check = pack_rows(goto_rows, len(self.non_terminals))
+
+    @classmethod
+    def from_arrays(cls, terminals, non_terminals, productions, arrays):
+        """Builds a table over existing int arrays (e.g. memoryviews of a mapped file) without copying them
+
+        arrays maps each name in ARRAYS to a sequence of ints.
+        """
+        table = cls.__new__(cls)
+        table.terminals = terminals
+        table.non_terminals = non_terminals
+        table.terminal_index = {t: i for i, t in enumerate(terminals)}
+        table.non_terminal_index = {nt: i for i, nt in enumerate(non_terminals)}
+        table.productions = productions
+        for name in cls.ARRAYS:
+            setattr(table, name, arrays[name])
+        return table
+
+    def action(self, state, column):
+        slot = self.action_base[state] + column
+        if slot < len(self.action_check) and self.action_check[slot] == state:
+            return self.action_values[slot]
+        return self.default_reduction[state]
+
+    def goto(self, state, non_terminal):
+        slot = self.goto_base[state] + non_terminal
+        if slot < len(self.goto_check) and self.goto_check[slot] == state:
+            return self.goto_values[slot]
+        return -1
+
+    def expected_terminals(self, state):
+        """Terminals with an action in the state: its packed entries and the columns of its default reduction"""
+        base = self.action_base[state]
+        check = self.action_check
+        columns = set(self.default_columns[self.default_offsets[state]:self.default_offsets[state + 1]])
+        columns.update(column for column in range(min(len(self.terminals), len(check) - base))
+                       if check[base + column] == state and self.action_values[base + column] != ERROR)
+        return [self.terminals[column] for column in sorted(columns)]
+
+    def memory_usage(self):
+        return sum(getattr(self, name).itemsize * len(getattr(self, name)) for name in self.ARRAYS)
+
+    def parse(self, tokens, build_tree=False):
+        """Runs the LR driver over the tokens and returns a JSON-serializable result"""
+        if isinstance(tokens, str):
+            tokens = tokens.split()
+        tokens = list(tokens)
+
+        # Only the appended end marker maps to the '$' column; a '$' in the input is an unknown token
+        terminal_index = self.terminal_index
+        columns = [terminal_index.get(token, -1) if token != '$' else -1 for token in tokens]
+        columns.append(terminal_index.get('$', -1))
+        tokens.append('$')
+        action_base = self.action_base
+        action_values = self.action_values
+        action_check = self.action_check
+        check_length = len(action_check)
+        default_reduction = self.default_reduction
+        production_lhs = self.production_lhs
+        production_length = self.production_length
+
+        stack = [0]
+        values = [] if build_tree else None
+        position = 0
+        reductions = 0
+
+        # A table with unresolved conflicts on a cyclic grammar can reduce
+        # forever without consuming input, so bound reductions between shifts
+        state_count = len(self.default_reduction)
+        pending_reductions = 0
+        reduction_limit = state_count * (state_count + 1)
+        column = columns[0]
+
+        while True:
+            state = stack[-1]
+            if column < 0:
+                code = ERROR
+            else:
+                slot = action_base[state] + column
+                if slot < check_length and action_check[slot] == state:
+                    code = action_values[slot]
+                else:
+                    code = default_reduction[state]
+
+            if code > 0:
+                # Shift
+                stack.append(code - 1)
+                pending_reductions = 0
+                reduction_limit = state_count * (len(stack) + state_count)
+                if build_tree:
+                    values.append(tokens[position])
+                position += 1
+                column = columns[position]
+
+            elif code == ACCEPT:
+                result = {'accepted': True, 'reductions': reductions}
+                if build_tree:
+                    result['tree'] = values[-1] if values else None
+                return result
+
+            elif code < 0:
+                # Reduce by production -code - 1
+                production = -code - 1
+                length = production_length[production]
+                if length:
+                    del stack[-length:]
+                stack.append(self.goto(stack[-1], production_lhs[production]))
+                reductions += 1
+                pending_reductions += 1
+                if pending_reductions > reduction_limit:
+                    return {
+                        'accepted': False,
+                        'position': position,
+                        'token': tokens[position],
+                        'expected': [],
+                        'error': 'reduction cycle'
+                    }
+
+                if build_tree:
+                    children = values[len(values) - length:] if length else []
+                    if length:
+                        del values[-length:]
+                    values.append([self.productions[production][0], children])
+
+            else:
+                return {
+                    'accepted': False,
+                    'position': position,
+                    'token': tokens[position],
+                    'expected': self.expected_terminals(state)
+                }
@@ -0,0 +1,61 @@
+import time
+from contextlib import contextmanager
+
+
+class PhaseStats:
+    """Wall time per construction phase plus named work counters"""
+
+    enabled = True
+
+    def __init__(self, listener=None):
+        self.phases = {}    # phase name -> seconds, in the order phases first ran
+        self.counters = {}
+        self.listener = listener  # called as listener(name, None) when a phase starts and listener(name, seconds) when it ends
+
+    @contextmanager
+    def phase(self, name):
+        if self.listener is not None:
+            self.listener(name, None)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+            if self.listener is not None:
+                self.listener(name, elapsed)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def to_dict(self):
+        return {
+            'phases_ms': {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()},
+            'counters': dict(self.counters)
+        }
+
+    def server_timing(self):
+        """Formats the phase times as a Server-Timing header value"""
+        return ', '.join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.phases.items())
+
+
+class NullStats:
+    """Stand-in for PhaseStats when profiling is disabled; every call is a no-op"""
+
+    enabled = False
+
+    @contextmanager
+    def phase(self, name):
+        yield
+
+    def count(self, name, amount=1):
+        pass
+
+    def to_dict(self):
+        return {}
+
+    def server_timing(self):
+        return ''
+
+
+NULL_STATS = NullStats()
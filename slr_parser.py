@@ -1,3 +1,12 @@
+from collections.abc import Mapping
+
+from parse_tables import CompactTable
+from profiling import PhaseStats, NULL_STATS
+from lalr import compute_lookaheads
+from incremental import GrammarDiff
+from grammar_reduction import LEVELS, reduce_grammar, reduction_summary, unit_goto_redirects
+
+
 class Grammar:
     def __init__(self, grammar_text):
         self.productions = []
@@ -5,6 +14,8 @@ class Grammar:
         self.terminals = set()
         self.start_symbol = None
         self.augmented = False
+        self.production_origin = None  # production id -> number in the grammar as written, after reduction
+        self.reduction = None
         self.parse_grammar(grammar_text)
 
     def parse_grammar(self, grammar_text):
@@ -22,7 +33,7 @@ class Grammar:
             rhs_parts = parts[1].strip().split('|')
             
             self.non_terminals.add(lhs)
-            if i == 0 and not self.start_symbol:
+            if not self.start_symbol:
                 self.start_symbol = lhs
             
             for rhs in rhs_parts:
@@ -40,6 +51,8 @@ class Grammar:
                         self.terminals.add(symbol)
                     else:
                         self.non_terminals.add(symbol)
+        
+        self.intern_symbols()
 
     def augment_grammar(self):
         if not self.augmented:
@@ -48,14 +61,109 @@ class Grammar:
                 new_start += "'"
             
             self.productions.insert(0, (new_start, self.start_symbol))
+            if self.production_origin is not None:
+                self.production_origin.insert(0, None)
             self.non_terminals.add(new_start)
             self.start_symbol = new_start
             self.augmented = True
+            
+            # Production numbers shifted, so the interned form must be rebuilt
+            self.intern_symbols()
         
         return self
 
+    def intern_symbols(self):
+        """Maps symbols to small ints and pre-splits every production's RHS"""
+        self.symbols = []       # symbol id -> name
+        self.symbol_ids = {}    # name -> symbol id
+        self.production_lhs = []  # production id -> lhs symbol id
+        self.production_rhs = []  # production id -> tuple of rhs symbol ids
+        self.rhs_symbols = []     # production id -> tuple of rhs names
+        self.production_index = {}  # (lhs, rhs) -> first production id
+        
+        def intern(symbol):
+            symbol_id = self.symbol_ids.get(symbol)
+            if symbol_id is None:
+                symbol_id = len(self.symbols)
+                self.symbol_ids[symbol] = symbol_id
+                self.symbols.append(symbol)
+            return symbol_id
+        
+        for lhs, rhs in self.productions:
+            symbols = tuple(rhs.split())
+            self.production_lhs.append(intern(lhs))
+            self.production_rhs.append(tuple(intern(symbol) for symbol in symbols))
+            self.rhs_symbols.append(symbols)
+            self.production_index.setdefault((lhs, rhs), len(self.rhs_symbols) - 1)
+        intern('$')
+        
+        self.is_non_terminal = [symbol in self.non_terminals for symbol in self.symbols]
+        
+        # Terminals (and the end-marker) get a bit position for FIRST/FOLLOW bitsets
+        self.terminal_symbols = [s for s, symbol in enumerate(self.symbols)
+                                 if not self.is_non_terminal[s] or symbol == '$']
+        self.terminal_bit = [0] * len(self.symbols)
+        for bit, symbol_id in enumerate(self.terminal_symbols):
+            self.terminal_bit[symbol_id] = 1 << bit
+        
+        # Productions indexed by LHS; repeated productions are listed once
+        self.productions_by_lhs = [[] for _ in self.symbols]
+        for production_id, lhs in enumerate(self.production_lhs):
+            if self.production_index[self.productions[production_id]] == production_id:
+                self.productions_by_lhs[lhs].append(production_id)
+        self.closure_cache = {}
+        
+        # Each LR(0) item is packed into a single int: item_base[p] + dot.
+        # Items are created once per grammar and shared by every item set.
+        self.item_base = []
+        self.lr0_items = []
+        for production_id, rhs in enumerate(self.production_rhs):
+            self.item_base.append(len(self.lr0_items))
+            for dot_position in range(len(rhs) + 1):
+                self.lr0_items.append(Item(self, production_id, dot_position))
+
+    def item(self, production_id, dot_position=0):
+        return self.lr0_items[self.item_base[production_id] + dot_position]
+
     def get_productions_for(self, non_terminal):
-        return [(lhs, rhs) for lhs, rhs in self.productions if lhs == non_terminal]
+        non_terminal_id = self.symbol_ids.get(non_terminal)
+        if non_terminal_id is None:
+            return []
+        return [self.productions[p] for p in self.productions_by_lhs[non_terminal_id]]
+
+    def get_production_ids_for(self, non_terminal_id):
+        return self.productions_by_lhs[non_terminal_id]
+
+    def closure_of(self, non_terminal_id):
+        """Returns the initial items [B -> •γ] for every B reachable from A through leftmost non-terminals"""
+        cached = self.closure_cache.get(non_terminal_id)
+        if cached is not None:
+            return cached
+        
+        items = []
+        reached = {non_terminal_id}
+        pending = [non_terminal_id]
+        while pending:
+            for production_id in self.productions_by_lhs[pending.pop()]:
+                items.append(self.item(production_id))
+                rhs = self.production_rhs[production_id]
+                if rhs and self.is_non_terminal[rhs[0]] and rhs[0] not in reached:
+                    reached.add(rhs[0])
+                    pending.append(rhs[0])
+        
+        cached = self.closure_cache[non_terminal_id] = frozenset(items)
+        return cached
+
+    def closure_items(self, kernel):
+        """Returns the kernel plus the cached closure of every non-terminal right after a dot in it"""
+        items = set(kernel)
+        expanded = set()
+        for item in kernel:
+            next_symbol = item.next_symbol_id
+            if next_symbol is not None and self.is_non_terminal[next_symbol] and next_symbol not in expanded:
+                expanded.add(next_symbol)
+                items |= self.closure_of(next_symbol)
+        return items
 
     def __str__(self):
         result = []
@@ -67,38 +175,56 @@ class Grammar:
 
 
 class Item:
-    def __init__(self, lhs, rhs, dot_position=0, lookahead=None):
-        self.lhs = lhs
-        self.rhs = rhs
+    __slots__ = ('grammar', 'production', 'dot_position', 'next_symbol_id', 'lookahead', 'key')
+
+    def __init__(self, grammar, production, dot_position=0, lookahead=None):
+        self.grammar = grammar
+        self.production = production
         self.dot_position = dot_position
         self.lookahead = lookahead  # Not used in SLR but kept for future expansion to LR(1)
+        
+        rhs = grammar.production_rhs[production]
+        self.next_symbol_id = rhs[dot_position] if dot_position < len(rhs) else None
+        
+        # Packed (production, dot) id; the lookahead only takes part when present
+        packed = grammar.item_base[production] + dot_position
+        self.key = packed if lookahead is None else (packed, lookahead)
+
+    @property
+    def lhs(self):
+        return self.grammar.productions[self.production][0]
+
+    @property
+    def rhs(self):
+        return self.grammar.productions[self.production][1]
+
+    def is_complete(self):
+        return self.next_symbol_id is None
 
     def get_next_symbol(self):
-        if self.dot_position < len(self.rhs.split()):
-            symbols = self.rhs.split()
-            return symbols[self.dot_position]
+        if self.next_symbol_id is not None:
+            return self.grammar.symbols[self.next_symbol_id]
         return None
 
     def advance_dot(self):
-        if self.dot_position < len(self.rhs.split()):
-            return Item(self.lhs, self.rhs, self.dot_position + 1, self.lookahead)
+        if self.next_symbol_id is not None:
+            if self.lookahead is None:
+                return self.grammar.item(self.production, self.dot_position + 1)
+            return Item(self.grammar, self.production, self.dot_position + 1, self.lookahead)
         return None
 
     def __eq__(self, other):
         if not isinstance(other, Item):
             return False
-        return (self.lhs == other.lhs and 
-                self.rhs == other.rhs and 
-                self.dot_position == other.dot_position and 
-                self.lookahead == other.lookahead)
+        return self.grammar is other.grammar and self.key == other.key
 
     def __hash__(self):
-        return hash((self.lhs, self.rhs, self.dot_position, self.lookahead))
+        return hash(self.key)
 
     def __str__(self):
-        symbols = self.rhs.split()
+        symbols = self.grammar.rhs_symbols[self.production]
         if not symbols:  # ε production
-            return f"[{self.lhs} -> • {'ε' if not self.rhs else self.rhs}]"
+            return f"[{self.lhs} -> • ε]"
         
         result = f"[{self.lhs} -> "
         for i, symbol in enumerate(symbols):
@@ -114,11 +240,24 @@ class Item:
 
 
 class ItemSet:
-    def __init__(self, items=None):
-        self.items = set(items) if items else set()
+    def __init__(self, items=None, kernel=None, grammar=None):
+        self.kernel = kernel  # frozenset of the items the closure was built from
+        self.grammar = grammar  # when given without items, the closure is built on first access
+        self.item_cache = set(items) if items else (None if grammar is not None else set())
+        self.reductions = ()  # complete items, filled in while the collection is built
         self.transitions = {}  # symbol -> ItemSet index
         self.index = None  # To be set when added to a collection
 
+    @property
+    def items(self):
+        if self.item_cache is None:
+            self.item_cache = self.grammar.closure_items(self.kernel)
+        return self.item_cache
+
+    @items.setter
+    def items(self, items):
+        self.item_cache = items
+
     def add_item(self, item):
         self.items.add(item)
 
@@ -130,13 +269,187 @@ class ItemSet:
     def __hash__(self):
         return hash(frozenset(self.items))
 
+    def sorted_items(self):
+        """Returns the items in production order, then by dot position"""
+        return sorted(self.items, key=lambda item: item.key)
+
     def __str__(self):
-        return f"I{self.index}:\n" + "\n".join(sorted(str(item) for item in self.items))
+        return f"I{self.index}:\n" + "\n".join(str(item) for item in self.sorted_items())
 
 
-class SLRParser:
-    def __init__(self, grammar_text):
-        self.grammar = Grammar(grammar_text)
+class ParsingTable(Mapping):
+    """Read-only dense view of the sparse ACTION/GOTO tables; rows are built on access"""
+
+    def __init__(self, parser):
+        self.parser = parser
+
+    def __getitem__(self, state):
+        if not isinstance(state, int) or not 0 <= state < len(self.parser.action_table):
+            raise KeyError(state)
+        
+        actions = self.parser.action_table[state]
+        gotos = self.parser.goto_table[state]
+        start_symbol = self.parser.grammar.start_symbol
+        return {
+            'action': {t: actions.get(t, '') for t in self.parser.terminals},
+            'goto': {nt: gotos.get(nt, '') for nt in self.parser.non_terminals if nt != start_symbol}
+        }
+
+    def __iter__(self):
+        return iter(range(len(self.parser.action_table)))
+
+    def __len__(self):
+        return len(self.parser.action_table)
+
+
+class TableViews:
+    """Rendering, export and parsing over a compiled grammar
+
+    Works on canonical_collection, action_table/goto_table, first_sets,
+    follow_sets and get_compact_table(), so it is shared by SLRParser and
+    by tables loaded from the store.
+    """
+
+    def parse(self, tokens, build_tree=False):
+        """Parses a sequence of terminals (or a whitespace-separated string) with the generated table"""
+        return self.get_compact_table().parse(tokens, build_tree)
+
+    def table_columns(self):
+        """Returns the sorted terminal and non-terminal columns of the parsing table"""
+        terminals = sorted(self.terminals)
+        non_terminals = sorted([nt for nt in self.non_terminals if nt != self.grammar.start_symbol])
+        return terminals, non_terminals
+
+    def iter_parsing_table_html(self, states=None):
+        """Yields the parsing table as HTML, one row per chunk"""
+        terminals, non_terminals = self.table_columns()
+        
+        # Header row
+        yield ''.join(['<table class="parsing-table"><tr><th>State</th>']
+                      + [f'<th>{terminal}</th>' for terminal in terminals]
+                      + [f'<th>{non_terminal}</th>' for non_terminal in non_terminals]
+                      + ['</tr>'])
+        
+        # Data rows
+        for state in states if states is not None else range(len(self.canonical_collection)):
+            yield self.parsing_table_row_html(state, terminals, non_terminals)
+        
+        yield '</table>'
+
+    def parsing_table_row_html(self, state, terminals, non_terminals):
+        actions = self.action_table[state]
+        gotos = self.goto_table[state]
+        return ''.join([f'<tr><td>{state}</td>']
+                       + [f'<td>{actions.get(terminal, "")}</td>' for terminal in terminals]
+                       + [f'<td>{gotos.get(non_terminal, "")}</td>' for non_terminal in non_terminals]
+                       + ['</tr>'])
+
+    def iter_canonical_collection_html(self, states=None):
+        """Yields the canonical collection as HTML, one item set per chunk"""
+        yield '<div class="canonical-collection">'
+        for state in states if states is not None else range(len(self.canonical_collection)):
+            yield self.item_set_html(state)
+        yield '</div>'
+
+    def item_set_html(self, state):
+        items = self.canonical_collection[state].sorted_items()
+        return ''.join([f'<div class="item-set"><h3>I{state}:</h3><ul>']
+                       + [f'<li>{item}</li>' for item in items]
+                       + ['</ul></div>'])
+
+    def iter_first_follow_sets_html(self):
+        """Yields the FIRST and FOLLOW sets as HTML"""
+        yield '<div class="sets-container">'
+        
+        # FIRST sets
+        yield '<div class="first-sets"><h3>FIRST Sets:</h3><ul>'
+        for symbol in sorted(self.first_sets.keys()):
+            first_set = ', '.join(sorted(self.first_sets[symbol])) or 'ø'
+            yield f'<li>FIRST({symbol}) = {{{first_set}}}</li>'
+        yield '</ul></div>'
+        
+        # FOLLOW sets
+        yield '<div class="follow-sets"><h3>FOLLOW Sets:</h3><ul>'
+        for nt in sorted(self.follow_sets.keys()):
+            follow_set = ', '.join(sorted(self.follow_sets[nt])) or 'ø'
+            yield f'<li>FOLLOW({nt}) = {{{follow_set}}}</li>'
+        yield '</ul></div>'
+        
+        yield '</div>'
+
+    def get_parsing_table_html(self):
+        """Returns the parsing table as an HTML table for display"""
+        with self.stats.phase('render_html'):
+            return ''.join(self.iter_parsing_table_html())
+
+    def get_canonical_collection_html(self):
+        """Returns the canonical collection as HTML for display"""
+        with self.stats.phase('render_html'):
+            return ''.join(self.iter_canonical_collection_html())
+
+    def get_first_follow_sets_html(self):
+        """Returns the FIRST and FOLLOW sets as HTML for display"""
+        with self.stats.phase('render_html'):
+            return ''.join(self.iter_first_follow_sets_html())
+
+    def get_state_data(self, state):
+        """Returns one state's items and transitions as plain data"""
+        item_set = self.canonical_collection[state]
+        return {
+            'state': state,
+            'items': [str(item) for item in item_set.sorted_items()],
+            'transitions': dict(sorted(item_set.transitions.items()))
+        }
+
+    def to_dict(self):
+        """Returns the grammar, sets, item sets and sparse table rows as JSON-serializable data"""
+        terminals, non_terminals = self.table_columns()
+        return {
+            'mode': self.mode,
+            'reduction': self.reduction,
+            'grammar': str(self.grammar),
+            'start_symbol': self.grammar.start_symbol,
+            'terminals': terminals,
+            'non_terminals': non_terminals,
+            'productions': [[lhs, list(rhs)] for (lhs, _), rhs in zip(self.productions, self.grammar.rhs_symbols)],
+            'first_sets': {symbol: sorted(first) for symbol, first in sorted(self.first_sets.items())},
+            'follow_sets': {nt: sorted(follow) for nt, follow in sorted(self.follow_sets.items())},
+            'states': [self.get_state_data(state) for state in range(len(self.canonical_collection))],
+            'action': list(self.action_table),
+            'goto': list(self.goto_table),
+            'conflicts': self.conflicts
+        }
+
+
+class SLRParser(TableViews):
+    MODES = ('slr', 'lalr')
+    REDUCTIONS = LEVELS
+
+    def __init__(self, grammar_text, profile=False, mode='slr', previous=None, progress=None, reduction='none',
+                 check_only=False):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown table construction mode: {mode}")
+        if reduction not in self.REDUCTIONS:
+            raise ValueError(f"Unknown grammar reduction: {reduction}")
+        
+        # 'slr' reduces on FOLLOW(A); 'lalr' on LALR(1) lookaheads of the same LR(0) states
+        self.mode = mode
+        
+        # A check-only parser stops at the first conflict; its tables are
+        # complete only when it found none
+        self.check_only = check_only
+        
+        # Per-phase wall time and work counters; a no-op unless profiling.
+        # progress(phase, seconds) is told when each phase starts (None) and ends
+        self.stats = PhaseStats(progress) if profile or progress is not None else NULL_STATS
+        
+        with self.stats.phase('parse_grammar'):
+            self.grammar = Grammar(grammar_text)
+        
+        # Optionally drop useless symbols before building states
+        if reduction != 'none':
+            with self.stats.phase('reduce_grammar'):
+                reduce_grammar(self.grammar, reduction)
         self.grammar.augment_grammar()
         self.terminals = self.grammar.terminals
         self.non_terminals = self.grammar.non_terminals
@@ -147,152 +460,248 @@ class SLRParser:
         
         self.first_sets = {}
         self.follow_sets = {}
+        self.first_bits = []     # symbol id -> bitset over grammar.terminal_symbols
+        self.follow_bits = []
+        self.nullable = []
         self.canonical_collection = []
+        self.action_table = []   # state -> {terminal: action}, non-empty entries only
+        self.goto_table = []     # state -> {non-terminal: state}
         self.parsing_table = {}
+        self.lookaheads = {}     # (state, production id) -> lookahead bitset, LALR mode only
+        self.conflicts = []      # conflict records, see state_actions()
+        
+        # With a previously compiled parser, results it shares with this
+        # grammar are carried over instead of recomputed. An edit that
+        # reaches most of the previous states is built from scratch instead
+        self.diff = GrammarDiff(previous, self.grammar) if previous is not None else None
+        self.reused_from = {}    # state -> previous parser's state it was carried over from
+        self.state_map = {}      # previous parser's state -> state with the same kernel
+        if self.diff is not None and not self.diff.worth_reusing():
+            self.diff = None
+            self.stats.count('full_rebuild')
         
         # Compute FIRST and FOLLOW sets
-        self.compute_first_sets()
-        self.compute_follow_sets()
+        with self.stats.phase('first_sets'):
+            self.compute_first_sets()
+        with self.stats.phase('follow_sets'):
+            self.compute_follow_sets()
         
         # Construct the canonical collection of LR(0) item sets
-        self.construct_canonical_collection()
+        with self.stats.phase('canonical_collection'):
+            self.construct_canonical_collection()
+        
+        # Propagate LALR(1) lookaheads through the LR(0) automaton
+        if self.mode == 'lalr':
+            with self.stats.phase('lalr_lookaheads'):
+                self.lookaheads = compute_lookaheads(self)
         
         # Build the SLR parsing table
-        self.build_parsing_table()
+        with self.stats.phase('parsing_table'):
+            self.build_parsing_table()
+        
+        # Unit reduction states are left out of the compact table
+        self.unit_redirects = {}
+        self.skipped_states = []
+        if reduction == 'units' and not check_only:
+            with self.stats.phase('unit_reductions'):
+                self.unit_redirects, self.skipped_states = unit_goto_redirects(self)
+        self.reduction = reduction_summary(self)
+        self.compact_table = None
+        
+        # Dropping the diff keeps a chain of edits from holding every earlier parser alive
+        self.diff = None
+        self.reused_from = {}
+        self.state_map = {}
+
+    def get_compact_table(self):
+        """Returns the array-encoded ACTION/GOTO tables used by parse(), building them on first use"""
+        if self.compact_table is None:
+            self.compact_table = CompactTable(self)
+        return self.compact_table
 
     def compute_first_sets(self):
-        # Initialize FIRST sets
-        for terminal in self.terminals:
-            self.first_sets[terminal] = {terminal}
-            
-        for non_terminal in self.non_terminals:
-            self.first_sets[non_terminal] = set()
+        grammar = self.grammar
+        is_non_terminal = grammar.is_non_terminal
+        symbol_count = len(grammar.symbols)
         
-        # Compute FIRST sets iteratively
-        changed = True
-        while changed:
-            changed = False
-            
-            for lhs, rhs in self.productions:
-                if not rhs:  # ε production
-                    if 'ε' not in self.first_sets[lhs]:
-                        self.first_sets[lhs].add('ε')
-                        changed = True
+        # Only non-terminals whose productions changed, or that use one, are
+        # recomputed; the rest keep the previous parser's values as constants
+        diff = self.diff
+        if diff is None:
+            affected = is_non_terminal
+        else:
+            affected = diff.first_affected()
+            previous = diff.previous
+        
+        self.nullable = [False] * symbol_count
+        self.first_bits = [0 if is_non_terminal[s] else grammar.terminal_bit[s] for s in range(symbol_count)]
+        if diff is not None:
+            for symbol_id in range(symbol_count):
+                if is_non_terminal[symbol_id] and not affected[symbol_id]:
+                    old_id = diff.old_id(symbol_id)
+                    self.nullable[symbol_id] = previous.nullable[old_id]
+                    self.first_bits[symbol_id] = diff.translate_bits(previous.first_bits[old_id])
+        productions = [p for p, lhs in enumerate(grammar.production_lhs) if affected[lhs]]
+        
+        # Nullability: a production becomes nullable once all of its RHS
+        # symbols are, so only productions that mention a newly nullable
+        # symbol are revisited
+        remaining = [0] * len(grammar.production_rhs)
+        occurrences = [[] for _ in range(symbol_count)]
+        pending = []
+        for production_id in productions:
+            for symbol_id in grammar.production_rhs[production_id]:
+                if affected[symbol_id]:
+                    occurrences[symbol_id].append(production_id)
+                    remaining[production_id] += 1
+                elif not self.nullable[symbol_id]:
+                    remaining[production_id] += 1
+            if not remaining[production_id]:
+                pending.append(grammar.production_lhs[production_id])
+        
+        iterations = 0
+        while pending:
+            symbol_id = pending.pop()
+            iterations += 1
+            if self.nullable[symbol_id]:
+                continue
+            self.nullable[symbol_id] = True
+            for production_id in occurrences[symbol_id]:
+                remaining[production_id] -= 1
+                if remaining[production_id] == 0:
+                    pending.append(grammar.production_lhs[production_id])
+        
+        # FIRST(A) gets the terminal bits of every leading terminal and an
+        # edge from every leading non-terminal, up to the first non-nullable symbol
+        dependents = [set() for _ in range(symbol_count)]
+        for production_id in productions:
+            lhs = grammar.production_lhs[production_id]
+            for symbol_id in grammar.production_rhs[production_id]:
+                if affected[symbol_id]:
+                    dependents[symbol_id].add(lhs)
                 else:
-                    rhs_symbols = rhs.split()
-                    # Add FIRST of the first symbol that can't derive ε
-                    all_derive_epsilon = True
-                    
-                    for symbol in rhs_symbols:
-                        # Add all non-ε symbols from FIRST(symbol) to FIRST(lhs)
-                        first_of_symbol = {s for s in self.first_sets[symbol] if s != 'ε'}
-                        if len(self.first_sets[lhs] | first_of_symbol) > len(self.first_sets[lhs]):
-                            self.first_sets[lhs] |= first_of_symbol
-                            changed = True
-                        
-                        # If this symbol can't derive ε, no need to look further
-                        if 'ε' not in self.first_sets[symbol]:
-                            all_derive_epsilon = False
-                            break
-                    
-                    # If all symbols in RHS can derive ε, add ε to FIRST(lhs)
-                    if all_derive_epsilon and rhs_symbols:
-                        if 'ε' not in self.first_sets[lhs]:
-                            self.first_sets[lhs].add('ε')
-                            changed = True
+                    self.first_bits[lhs] |= self.first_bits[symbol_id]
+                if not self.nullable[symbol_id]:
+                    break
+        
+        iterations += self.propagate_bits(self.first_bits, dependents)
+        self.stats.count('first_iterations', iterations)
+        
+        # Dict-of-sets view used by the HTML renderers
+        self.first_sets = {}
+        for symbol_id, symbol in enumerate(grammar.symbols):
+            if not is_non_terminal[symbol_id]:
+                first_set = {symbol}
+            elif not affected[symbol_id]:
+                first_set = previous.first_sets[symbol]
+            else:
+                first_set = self.terminals_of(self.first_bits[symbol_id])
+                if self.nullable[symbol_id]:
+                    first_set.add('ε')
+            self.first_sets[symbol] = first_set
+        self.stats.count('first_recomputed', sum(1 for s in range(symbol_count) if is_non_terminal[s] and affected[s]))
 
     def compute_follow_sets(self):
-        # Initialize FOLLOW sets
-        for non_terminal in self.non_terminals:
-            self.follow_sets[non_terminal] = set()
+        grammar = self.grammar
+        is_non_terminal = grammar.is_non_terminal
+        symbol_count = len(grammar.symbols)
+        
+        diff = self.diff
+        if diff is None:
+            affected = is_non_terminal
+        else:
+            affected = diff.follow_affected(self.nullable)
+            previous = diff.previous
+        
+        self.follow_bits = [0] * symbol_count
+        if diff is not None:
+            for symbol_id in range(symbol_count):
+                if is_non_terminal[symbol_id] and not affected[symbol_id]:
+                    self.follow_bits[symbol_id] = diff.translate_bits(previous.follow_bits[diff.old_id(symbol_id)])
         
         # Add $ to FOLLOW of start symbol
-        self.follow_sets[self.grammar.start_symbol].add('$')
+        start_id = grammar.symbol_ids[grammar.start_symbol]
+        self.follow_bits[start_id] |= grammar.terminal_bit[grammar.symbol_ids['$']]
         
-        # Compute FOLLOW sets iteratively
-        changed = True
-        while changed:
-            changed = False
-            
-            for lhs, rhs in self.productions:
-                if not rhs:  # Skip ε productions
-                    continue
-                    
-                rhs_symbols = rhs.split()
+        # For each B in A -> αBβ, FIRST(β) goes straight into FOLLOW(B); if β
+        # is nullable, FOLLOW(A) flows into FOLLOW(B) along an edge A -> B
+        dependents = [set() for _ in range(symbol_count)]
+        for lhs, rhs in zip(grammar.production_lhs, grammar.production_rhs):
+            first_of_rest = 0
+            rest_nullable = True
+            for symbol_id in reversed(rhs):
+                if affected[symbol_id]:
+                    self.follow_bits[symbol_id] |= first_of_rest
+                    if rest_nullable:
+                        if affected[lhs]:
+                            dependents[lhs].add(symbol_id)
+                        else:
+                            self.follow_bits[symbol_id] |= self.follow_bits[lhs]
                 
-                # For each symbol B in A -> αBβ
-                for i, symbol in enumerate(rhs_symbols):
-                    # Only consider non-terminals
-                    if symbol not in self.non_terminals:
-                        continue
-                    
-                    # Compute first of everything after B
-                    rest = rhs_symbols[i+1:]
-                    if not rest:  # B is at the end
-                        # Add FOLLOW(A) to FOLLOW(B)
-                        if len(self.follow_sets[symbol] | self.follow_sets[lhs]) > len(self.follow_sets[symbol]):
-                            self.follow_sets[symbol] |= self.follow_sets[lhs]
-                            changed = True
-                    else:
-                        # Compute FIRST(rest)
-                        first_of_rest = set()
-                        all_derive_epsilon = True
-                        
-                        for rest_symbol in rest:
-                            # Add all non-ε symbols from FIRST(rest_symbol)
-                            first_of_rest |= {s for s in self.first_sets[rest_symbol] if s != 'ε'}
-                            
-                            # If this symbol can't derive ε, we're done
-                            if 'ε' not in self.first_sets[rest_symbol]:
-                                all_derive_epsilon = False
-                                break
-                        
-                        # Add FIRST(rest) to FOLLOW(B)
-                        if len(self.follow_sets[symbol] | first_of_rest) > len(self.follow_sets[symbol]):
-                            self.follow_sets[symbol] |= first_of_rest
-                            changed = True
-                        
-                        # If all symbols in rest can derive ε, add FOLLOW(A) to FOLLOW(B)
-                        if all_derive_epsilon:
-                            if len(self.follow_sets[symbol] | self.follow_sets[lhs]) > len(self.follow_sets[symbol]):
-                                self.follow_sets[symbol] |= self.follow_sets[lhs]
-                                changed = True
-
-    def closure(self, item_set):
-        result = ItemSet(item_set.items.copy())
+                if self.nullable[symbol_id]:
+                    first_of_rest |= self.first_bits[symbol_id]
+                else:
+                    first_of_rest = self.first_bits[symbol_id]
+                    rest_nullable = False
         
-        changed = True
-        while changed:
-            changed = False
-            new_items = set()
-            
-            for item in result.items:
-                # Get the symbol after the dot
-                next_symbol = item.get_next_symbol()
-                
-                # If the symbol after the dot is a non-terminal
-                if next_symbol in self.non_terminals:
-                    # Add all productions of this non-terminal
-                    for lhs, rhs in self.grammar.get_productions_for(next_symbol):
-                        new_item = Item(lhs, rhs, 0)
-                        if new_item not in result.items:
-                            new_items.add(new_item)
-                            changed = True
-            
-            result.items.update(new_items)
+        self.stats.count('follow_iterations', self.propagate_bits(self.follow_bits, dependents))
         
+        # Dict-of-sets view used by the HTML renderers
+        self.follow_sets = {}
+        for symbol_id in range(symbol_count):
+            if not is_non_terminal[symbol_id]:
+                continue
+            symbol = grammar.symbols[symbol_id]
+            if affected[symbol_id]:
+                self.follow_sets[symbol] = self.terminals_of(self.follow_bits[symbol_id])
+            else:
+                self.follow_sets[symbol] = previous.follow_sets[symbol]
+        self.stats.count('follow_recomputed', sum(1 for s in range(symbol_count) if is_non_terminal[s] and affected[s]))
+
+    def propagate_bits(self, bits, dependents):
+        """Pushes each symbol's bitset along its edges until nothing changes, revisiting only changed symbols
+
+        Returns the number of worklist iterations.
+        """
+        pending = [s for s in range(len(bits)) if bits[s] and dependents[s]]
+        iterations = 0
+        while pending:
+            symbol_id = pending.pop()
+            iterations += 1
+            source = bits[symbol_id]
+            for target in dependents[symbol_id]:
+                merged = bits[target] | source
+                if merged != bits[target]:
+                    bits[target] = merged
+                    pending.append(target)
+        return iterations
+
+    def terminals_of(self, bits):
+        return set(self.terminal_list(bits))
+
+    def terminal_list(self, bits):
+        """The terminals in a bitset in bit order, which unlike a set's order does not vary between runs"""
+        terminal_symbols = self.grammar.terminal_symbols
+        symbols = self.grammar.symbols
+        result = []
+        while bits:
+            low = bits & -bits
+            result.append(symbols[terminal_symbols[low.bit_length() - 1]])
+            bits ^= low
         return result
 
+    def closure(self, item_set):
+        kernel = frozenset(item_set.items)
+        return ItemSet(self.grammar.closure_items(kernel), kernel=kernel)
+
     def goto(self, item_set, symbol):
+        symbol_id = self.grammar.symbol_ids.get(symbol, symbol)
         new_items = set()
         
         for item in item_set.items:
-            # If the next symbol matches the given symbol
-            if item.get_next_symbol() == symbol:
-                # Advance the dot and add to the new set
-                new_item = item.advance_dot()
-                if new_item:
-                    new_items.add(new_item)
+            # If the next symbol matches the given symbol, advance the dot
+            if item.next_symbol_id == symbol_id:
+                new_items.add(item.advance_dot())
         
         # If there are any new items, compute closure
         if new_items:
@@ -302,168 +711,243 @@ class SLRParser:
 
     def construct_canonical_collection(self):
         # Start with the closure of {[S' -> •S]}
-        start_production = next((p for p in self.productions if p[0] == self.grammar.start_symbol), None)
-        if not start_production:
+        start_id = self.grammar.symbol_ids.get(self.grammar.start_symbol)
+        start_production = next((p for p, lhs in enumerate(self.grammar.production_lhs) if lhs == start_id), None)
+        if start_production is None:
             raise ValueError("Augmented grammar is missing the start production")
         
-        initial_item = Item(start_production[0], start_production[1])
+        initial_item = self.grammar.item(start_production)
         initial_set = self.closure(ItemSet({initial_item}))
         
         self.canonical_collection = [initial_set]
         initial_set.index = 0
         
+        # States are identified by their kernel, so a GOTO target only needs
+        # a dict lookup and its closure is computed only when it is new
+        states_by_kernel = {initial_set.kernel: 0}
+        symbols = self.grammar.symbols
+        symbol_ids = self.grammar.symbol_ids
+        
+        # Previous states untouched by the edit already know their GOTO
+        # kernels and reductions; their closures are only built if something reads them
+        if self.diff is not None:
+            reusable, translated = self.diff.reusable_states()
+            previous_collection = self.diff.previous.canonical_collection
+        else:
+            reusable = {}
+        
         # Process all item sets and find their transitions
         processed = 0
+        goto_calls = 0
+        closure_calls = 1
+        reused_states = 0
         while processed < len(self.canonical_collection):
             current_set = self.canonical_collection[processed]
             
-            # Find all possible symbols after dots
-            symbols = set()
-            for item in current_set.items:
-                next_symbol = item.get_next_symbol()
-                if next_symbol:
-                    symbols.add(next_symbol)
-            
-            # Compute GOTO for each symbol
-            for symbol in symbols:
-                goto_set = self.goto(current_set, symbol)
-                
-                if goto_set:
-                    # Check if this set already exists
-                    exists = False
-                    for i, existing_set in enumerate(self.canonical_collection):
-                        if goto_set == existing_set:
-                            current_set.transitions[symbol] = i
-                            exists = True
-                            break
-                    
-                    # If not, add it to the collection
-                    if not exists:
-                        goto_set.index = len(self.canonical_collection)
-                        self.canonical_collection.append(goto_set)
-                        current_set.transitions[symbol] = goto_set.index
+            old_state = reusable.get(current_set.kernel)
+            if old_state is not None:
+                reused_states += 1
+                self.reused_from[processed] = old_state
+                previous_set = previous_collection[old_state]
+                kernels = {symbol_ids[symbol]: translated[target]
+                           for symbol, target in previous_set.transitions.items()}
+                current_set.reductions = self.diff.translate_items(previous_set.reductions)
+            else:
+                # Group the advanced items by the symbol after the dot
+                kernels = {}
+                reductions = []
+                for item in current_set.items:
+                    if item.next_symbol_id is not None:
+                        kernels.setdefault(item.next_symbol_id, []).append(item.advance_dot())
+                    else:
+                        reductions.append(item)
+                current_set.reductions = tuple(sorted(reductions, key=lambda item: item.key))
             
-            processed += 1
-
-    def build_parsing_table(self):
-        # Initialize the parsing table
-        for i in range(len(self.canonical_collection)):
-            self.parsing_table[i] = {
-                'action': {t: '' for t in self.terminals},
-                'goto': {nt: '' for nt in self.non_terminals if nt != self.grammar.start_symbol}
-            }
-        
-        # Build the action part of the parsing table
-        for i, item_set in enumerate(self.canonical_collection):
-            for item in item_set.items:
-                # Case 1: [A -> α•aβ] - Shift
-                next_symbol = item.get_next_symbol()
-                if next_symbol in self.terminals and next_symbol in item_set.transitions:
-                    next_state = item_set.transitions[next_symbol]
-                    action = f"s{next_state}"
-                    
-                    # Check for conflicts
-                    if self.parsing_table[i]['action'][next_symbol] and self.parsing_table[i]['action'][next_symbol] != action:
-                        print(f"Shift-Reduce conflict at state {i} for symbol {next_symbol}: "
-                              f"{self.parsing_table[i]['action'][next_symbol]} vs {action}")
-                    
-                    self.parsing_table[i]['action'][next_symbol] = action
+            # Visit symbols in id order so state numbering is deterministic
+            for symbol_id in sorted(kernels):
+                goto_calls += 1
+                kernel = frozenset(kernels[symbol_id])
+                state = states_by_kernel.get(kernel)
                 
-                # Case 2: [A -> α•] - Reduce
-                elif item.dot_position == len(item.rhs.split()) if item.rhs else True:
-                    # Don't reduce for the augmented start production
-                    if item.lhs == self.grammar.start_symbol and not item.rhs.split():
-                        continue
-                    
-                    # Find the production number
-                    prod_num = self.productions.index((item.lhs, item.rhs))
-                    
-                    # Add reduce actions for each terminal in FOLLOW(A)
-                    for terminal in self.follow_sets[item.lhs]:
-                        action = f"r{prod_num}"
-                        
-                        # Check for conflicts
-                        if self.parsing_table[i]['action'][terminal] and self.parsing_table[i]['action'][terminal] != action:
-                            print(f"Reduce-Reduce conflict at state {i} for symbol {terminal}: "
-                                  f"{self.parsing_table[i]['action'][terminal]} vs {action}")
-                        
-                        self.parsing_table[i]['action'][terminal] = action
+                # If it is a new kernel, close it and add it to the collection
+                if state is None:
+                    if kernel in reusable:
+                        goto_set = ItemSet(kernel=kernel, grammar=self.grammar)
+                    else:
+                        goto_set = self.closure(ItemSet(kernel))
+                        closure_calls += 1
+                    state = goto_set.index = len(self.canonical_collection)
+                    states_by_kernel[kernel] = state
+                    self.canonical_collection.append(goto_set)
                 
-                # Case 3: [S' -> S•] - Accept
-                elif (item.lhs == self.grammar.start_symbol and 
-                      item.rhs.split() == [self.grammar.productions[0][1]] and
-                      item.dot_position == 1):
-                    self.parsing_table[i]['action']['$'] = "acc"
+                current_set.transitions[symbols[symbol_id]] = state
             
-            # Fill in the goto part of the parsing table
-            for non_terminal in self.non_terminals:
-                if non_terminal != self.grammar.start_symbol and non_terminal in item_set.transitions:
-                    self.parsing_table[i]['goto'][non_terminal] = item_set.transitions[non_terminal]
-
-    def get_parsing_table_html(self):
-        """Returns the parsing table as an HTML table for display"""
-        terminals = sorted(self.terminals)
-        non_terminals = sorted([nt for nt in self.non_terminals if nt != self.grammar.start_symbol])
+            # FOLLOW sets are already known, so a check-only SLR build fills
+            # each state's rows as soon as its transitions are, and stops at a conflict
+            if self.check_only and self.mode == 'slr':
+                self.action_table.append({})
+                self.goto_table.append({})
+                if not self.state_actions(processed, current_set, self.action_table[-1], self.goto_table[-1]):
+                    break
+            
+            processed += 1
         
-        html = '<table class="parsing-table">'
+        if self.diff is not None:
+            self.state_map = {old_state: states_by_kernel[kernel] for old_state, kernel in enumerate(translated)
+                              if kernel in states_by_kernel}
         
-        # Header row
-        html += '<tr><th>State</th>'
-        for terminal in terminals:
-            html += f'<th>{terminal}</th>'
-        for non_terminal in non_terminals:
-            html += f'<th>{non_terminal}</th>'
-        html += '</tr>'
+        self.stats.count('closure_calls', closure_calls)
+        self.stats.count('goto_calls', goto_calls)
+        self.stats.count('states', len(self.canonical_collection))
+        self.stats.count('reused_states', reused_states)
+
+    def state_actions(self, i, item_set, actions, gotos):
+        """Fills state i's ACTION and GOTO rows from its complete items and transitions
+
+        Returns False if the state has a conflict. Each conflict is added to
+        self.conflicts as a dict with the state, the terminal, its type
+        ('shift-reduce' or 'reduce-reduce'), the two competing actions, the
+        action kept in the table (the later reduction, or the shift), and
+        the items behind them.
+        """
+        conflict_free = True
         
-        # Data rows
-        for state in range(len(self.canonical_collection)):
-            html += f'<tr><td>{state}</td>'
+        # The closure is never scanned: complete items give the reductions
+        for item in item_set.reductions:
+            # Case 1: [S' -> S•] - Accept
+            if item.production == 0:
+                actions['$'] = "acc"
+                continue
             
-            # Action columns
-            for terminal in terminals:
-                html += f'<td>{self.parsing_table[state]["action"].get(terminal, "")}</td>'
+            # Case 2: [A -> α•] - Reduce
+            # Find the production number
+            prod_num = self.grammar.production_index[(item.lhs, item.rhs)]
             
-            # Goto columns
-            for non_terminal in non_terminals:
-                html += f'<td>{self.parsing_table[state]["goto"].get(non_terminal, "")}</td>'
+            # Add reduce actions for each terminal in FOLLOW(A), or in the
+            # item's own lookahead set when building LALR(1) tables. They are
+            # visited in bit order so conflicts are reported in the same order every run
+            lookahead = self.terminal_list(self.lookahead_bits(i, item.production))
             
-            html += '</tr>'
-        
-        html += '</table>'
-        return html
-
-    def get_canonical_collection_html(self):
-        """Returns the canonical collection as HTML for display"""
-        html = '<div class="canonical-collection">'
+            for terminal in lookahead:
+                action = f"r{prod_num}"
+                
+                # Check for conflicts
+                if actions.get(terminal, action) != action:
+                    self.add_conflict(i, item_set, terminal, actions[terminal], action)
+                    conflict_free = False
+                
+                actions[terminal] = action
         
-        for i, item_set in enumerate(self.canonical_collection):
-            html += f'<div class="item-set"><h3>I{i}:</h3><ul>'
-            
-            for item in sorted(item_set.items, key=str):
-                html += f'<li>{str(item)}</li>'
+        for symbol, target in item_set.transitions.items():
+            # Case 3: [A -> α•aβ] - Shift
+            if symbol in self.terminals:
+                action = f"s{target}"
+                
+                # Check for conflicts
+                if actions.get(symbol, action) != action:
+                    self.add_conflict(i, item_set, symbol, actions[symbol], action)
+                    conflict_free = False
+                
+                actions[symbol] = action
             
-            html += '</ul></div>'
+            # Fill in the goto part of the parsing table
+            elif symbol in self.non_terminals and symbol != self.grammar.start_symbol:
+                gotos[symbol] = target
         
-        html += '</div>'
-        return html
+        return conflict_free
 
-    def get_first_follow_sets_html(self):
-        """Returns the FIRST and FOLLOW sets as HTML for display"""
-        html = '<div class="sets-container">'
+    def lookahead_bits(self, state, production_id):
+        """Terminals a reduction by the production in the state is taken on, as a bitset"""
+        if self.mode == 'lalr':
+            return self.lookaheads.get((state, production_id), 0)
+        return self.follow_bits[self.grammar.production_lhs[production_id]]
+
+    def reuse_rows(self):
+        """Copies the rows of carried-over states from the previous parser, renumbering their actions
+
+        A state's rows are copied only if every reduction in it has the same
+        lookaheads as before, and it had no conflict, so that conflicts are
+        reported again. Returns the states whose rows were filled in.
+        """
+        diff = self.diff
+        previous = diff.previous
+        previous_collection = previous.canonical_collection
+        production_map = diff.production_map
+        state_map = self.state_map
+        codes = diff.action_codes(state_map)
+        conflicted = {conflict['state'] for conflict in previous.conflicts}
         
-        # FIRST sets
-        html += '<div class="first-sets"><h3>FIRST Sets:</h3><ul>'
-        for symbol in sorted(self.first_sets.keys()):
-            first_set = ', '.join(sorted(self.first_sets[symbol])) or 'ø'
-            html += f'<li>FIRST({symbol}) = {{{first_set}}}</li>'
-        html += '</ul></div>'
+        # SLR lookaheads only depend on the production, so between two SLR
+        # tables each production is compared once
+        kept_lookaheads = {}
+        per_state = self.mode == 'lalr' or previous.mode == 'lalr'
+        filled = set()
+        for i, old_state in self.reused_from.items():
+            if old_state in conflicted:
+                continue
+            for item in previous_collection[old_state].reductions:
+                production = item.production
+                if not production:
+                    continue
+                key = (i, production) if per_state else production
+                kept = kept_lookaheads.get(key)
+                if kept is None:
+                    # Lookaheads on a terminal the grammar no longer has translate to nothing
+                    old_bits = previous.lookahead_bits(old_state, production)
+                    bits = diff.translate_bits(old_bits)
+                    kept = kept_lookaheads[key] = (bits == self.lookahead_bits(i, production_map[production])
+                                                   and bits.bit_count() == old_bits.bit_count())
+                if not kept:
+                    break
+            else:
+                self.action_table[i] = {symbol: codes[code] for symbol, code in previous.action_table[old_state].items()}
+                self.goto_table[i] = {symbol: state_map[target]
+                                      for symbol, target in previous.goto_table[old_state].items()}
+                filled.add(i)
+        return filled
+
+    def add_conflict(self, state, item_set, symbol, existing, action):
+        """Records that action replaced existing for symbol in the state"""
+        productions = set()
+        for code in (existing, action):
+            if code == 'acc':
+                productions.add(0)
+            elif code[0] == 'r':
+                productions.add(int(code[1:]))
         
-        # FOLLOW sets
-        html += '<div class="follow-sets"><h3>FOLLOW Sets:</h3><ul>'
-        for nt in sorted(self.follow_sets.keys()):
-            follow_set = ', '.join(sorted(self.follow_sets[nt])) or 'ø'
-            html += f'<li>FOLLOW({nt}) = {{{follow_set}}}</li>'
-        html += '</ul></div>'
+        # Items that reduce by one of the competing productions or shift the symbol
+        production_index = self.grammar.production_index
+        items = [str(item) for item in item_set.sorted_items()
+                 if (item.is_complete() and production_index[(item.lhs, item.rhs)] in productions)
+                 or (not item.is_complete() and item.get_next_symbol() == symbol)]
+        
+        self.conflicts.append({
+            'state': state,
+            'symbol': symbol,
+            'type': 'shift-reduce' if 's' in (existing[0], action[0]) else 'reduce-reduce',
+            'actions': [existing, action],
+            'kept': action,
+            'items': items
+        })
+        self.stats.count('conflicts')
+
+    def build_parsing_table(self):
+        # Only non-empty entries are stored; dense rows come from the
+        # parsing_table view when something asks for them. A check-only SLR
+        # build has filled them in already
+        if not (self.check_only and self.mode == 'slr'):
+            self.action_table = [{} for _ in self.canonical_collection]
+            self.goto_table = [{} for _ in self.canonical_collection]
+            
+            # Carried-over states keep their previous rows unless a lookahead changed
+            reused = self.reuse_rows() if self.reused_from and not self.check_only else set()
+            for i, item_set in enumerate(self.canonical_collection):
+                if i in reused:
+                    continue
+                if not self.state_actions(i, item_set, self.action_table[i], self.goto_table[i]) and self.check_only:
+                    break
+            self.stats.count('reused_rows', len(reused))
         
-        html += '</div>'
-        return html 
\ No newline at end of file
+        self.parsing_table = ParsingTable(self)
+        self.stats.count('action_entries', sum(len(row) for row in self.action_table))
+        self.stats.count('goto_entries', sum(len(row) for row in self.goto_table))
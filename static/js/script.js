@@ -3,11 +3,21 @@ document.addEventListener('DOMContentLoaded', function() {
     const grammarInput = document.getElementById('grammar-input');
     const parseBtn = document.getElementById('parse-btn');
     const loadExampleBtn = document.getElementById('load-example');
+    const modeSelect = document.getElementById('mode-select');
+    const reduceSelect = document.getElementById('reduce-select');
+    const cancelBtn = document.getElementById('cancel-btn');
     const resultsSection = document.getElementById('results-section');
     const errorMessage = document.getElementById('error-message');
     const tabButtons = document.querySelectorAll('.tab-btn');
     const tabContents = document.querySelectorAll('.tab-content');
     
+    // Handle of the last generated grammar, so an edited grammar can reuse its results
+    let lastHandle = null;
+    
+    // Id of the background job being waited for, if any
+    let currentJob = null;
+    const JOB_POLL_INTERVAL = 250;
+    
     // Parse Button Click Handler
     parseBtn.addEventListener('click', function() {
         const grammar = grammarInput.value.trim();
@@ -22,26 +32,38 @@ document.addEventListener('DOMContentLoaded', function() {
         parseBtn.disabled = true;
         hideError();
         
-        // Send grammar to server
-        fetch('/parse', {
+        // Small grammars come back compiled; large ones become a background job to poll
+        fetch('/jobs', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/x-www-form-urlencoded',
             },
-            body: 'grammar=' + encodeURIComponent(grammar)
+            body: 'grammar=' + encodeURIComponent(grammar) + '&mode=' + encodeURIComponent(modeSelect.value)
+                + '&reduce=' + encodeURIComponent(reduceSelect.value)
+                + (lastHandle ? '&previous=' + encodeURIComponent(lastHandle) : '')
         })
         .then(response => response.json())
         .then(data => {
-            // Reset button state
-            parseBtn.textContent = 'Generate SLR Parsing Table';
-            parseBtn.disabled = false;
+            if (data.success && data.status !== 'done') {
+                return waitForJob(data.id);
+            }
+            return data.success ? data.result : data;
+        })
+        .then(data => {
+            resetParseButton();
             
             if (data.success) {
-                // Show results
-                document.getElementById('parsing-table-content').innerHTML = data.parsing_table;
-                document.getElementById('canonical-collection-content').innerHTML = data.canonical_collection;
+                lastHandle = data.handle;
+                document.getElementById('parsing-table-title').textContent =
+                    data.mode === 'lalr' ? 'LALR(1) Parsing Table' : 'SLR Parsing Table';
+                
+                // Show results; states and table rows are fetched as they scroll into view
+                renderParsingTable(document.getElementById('parsing-table-content'), data);
+                renderCanonicalCollection(document.getElementById('canonical-collection-content'), data);
                 document.getElementById('first-follow-content').innerHTML = data.first_follow_sets;
-                document.getElementById('grammar-content').textContent = data.grammar;
+                renderConflicts(document.getElementById('conflicts'), data.conflicts);
+                document.getElementById('grammar-content').textContent =
+                    data.grammar + describeReduction(data.reduction);
                 
                 resultsSection.classList.remove('hidden');
                 scrollToResults();
@@ -50,12 +72,51 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         })
         .catch(error => {
-            parseBtn.textContent = 'Generate SLR Parsing Table';
-            parseBtn.disabled = false;
+            resetParseButton();
             showError('Network error: ' + error.message);
         });
     });
     
+    // Cancel Button Click Handler
+    cancelBtn.addEventListener('click', function() {
+        if (currentJob) {
+            fetch('/jobs/' + currentJob, { method: 'DELETE' });
+        }
+    });
+    
+    // Polls a background job, showing its current phase, until it finishes
+    function waitForJob(jobId) {
+        currentJob = jobId;
+        cancelBtn.classList.remove('hidden');
+        
+        return new Promise((resolve, reject) => {
+            function poll() {
+                fetch('/jobs/' + jobId)
+                    .then(response => response.json())
+                    .then(job => {
+                        if (job.status === 'done') {
+                            resolve(job.result);
+                        } else if (job.status === 'queued' || job.status === 'running') {
+                            parseBtn.textContent = job.phase ? 'Generating... (' + job.phase.replace(/_/g, ' ') + ')'
+                                : job.status === 'queued' ? 'Waiting for a worker...' : 'Generating...';
+                            setTimeout(poll, JOB_POLL_INTERVAL);
+                        } else {
+                            resolve({ success: false, error: job.error || 'The job ' + job.status });
+                        }
+                    })
+                    .catch(reject);
+            }
+            poll();
+        });
+    }
+    
+    function resetParseButton() {
+        currentJob = null;
+        cancelBtn.classList.add('hidden');
+        parseBtn.textContent = 'Generate SLR Parsing Table';
+        parseBtn.disabled = false;
+    }
+    
     // Load Example Button Click Handler
     loadExampleBtn.addEventListener('click', function() {
         fetch('/example')
@@ -82,6 +143,207 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
     
+    // Virtualized Results
+    const PAGE_SIZE = 100;
+    const OVERSCAN = 10;
+    const TABLE_ROW_HEIGHT = 36;
+    const ITEM_SET_CHROME = 80;
+    const ITEM_LINE_HEIGHT = 24;
+    const ITEM_SET_GAP = 15;
+    
+    function renderParsingTable(container, data) {
+        const columns = data.terminals.length + data.non_terminals.length + 1;
+        const header = '<table class="parsing-table virtual-header" style="width: ' + tableWidth(columns) + 'px"><tr><th>State</th>' +
+            data.terminals.map(t => '<th>' + escapeHtml(t) + '</th>').join('') +
+            data.non_terminals.map(nt => '<th>' + escapeHtml(nt) + '</th>').join('') +
+            '</tr></table>';
+        
+        createVirtualList(container, {
+            count: data.state_count,
+            header: header,
+            heightOf: () => TABLE_ROW_HEIGHT,
+            url: start => '/grammars/' + data.handle + '/table?start=' + start + '&count=' + PAGE_SIZE,
+            itemsOf: page => page.rows,
+            wrap: rows => '<table class="parsing-table" style="width: ' + tableWidth(columns) + 'px">' + rows + '</table>',
+            render: (state, row) => {
+                let cells = '<td>' + state + '</td>';
+                if (row) {
+                    cells += data.terminals.map(t => '<td>' + escapeHtml(row.action[t] || '') + '</td>').join('');
+                    cells += data.non_terminals.map(nt => '<td>' + (nt in row.goto ? row.goto[nt] : '') + '</td>').join('');
+                } else {
+                    cells += '<td colspan="' + (columns - 1) + '">Loading...</td>';
+                }
+                return '<tr style="height: ' + TABLE_ROW_HEIGHT + 'px">' + cells + '</tr>';
+            }
+        });
+    }
+    
+    function renderCanonicalCollection(container, data) {
+        const heightOf = state => ITEM_SET_CHROME + data.state_sizes[state] * ITEM_LINE_HEIGHT + ITEM_SET_GAP;
+        
+        createVirtualList(container, {
+            count: data.state_count,
+            header: '',
+            heightOf: heightOf,
+            url: start => '/grammars/' + data.handle + '/states?start=' + start + '&count=' + PAGE_SIZE,
+            itemsOf: page => page.states,
+            wrap: sets => '<div class="canonical-collection virtual">' + sets + '</div>',
+            render: (state, itemSet) => {
+                const items = itemSet
+                    ? itemSet.items.map(item => '<li>' + escapeHtml(item) + '</li>').join('')
+                    : '<li>Loading...</li>';
+                return '<div class="item-set" style="height: ' + (heightOf(state) - ITEM_SET_GAP) + 'px">' +
+                    '<h3>I' + state + ':</h3><ul>' + items + '</ul></div>';
+            }
+        });
+    }
+    
+    // Open virtual lists by container, so regenerating tears down the previous one
+    const virtualLists = new Map();
+    
+    function createVirtualList(container, options) {
+        if (virtualLists.has(container)) {
+            virtualLists.get(container).destroy();
+        }
+        container.innerHTML = '<div class="virtual-scroll">' + options.header +
+            '<div class="virtual-spacer"></div><div class="virtual-window"></div></div>';
+        const viewport = container.querySelector('.virtual-scroll');
+        const spacer = container.querySelector('.virtual-spacer');
+        const windowEl = container.querySelector('.virtual-window');
+        const headerEl = options.header ? viewport.firstElementChild : null;
+        
+        // Prefix sums of row heights, so any scroll offset maps to a row by binary search
+        const offsets = new Float64Array(options.count + 1);
+        for (let i = 0; i < options.count; i++) {
+            offsets[i + 1] = offsets[i] + options.heightOf(i);
+        }
+        spacer.style.height = offsets[options.count] + 'px';
+        
+        const loaded = new Map();   // index -> row data
+        const requested = new Set(); // page starts already fetched or in flight
+        let scheduled = false;
+        let destroyed = false;
+        
+        function rowAt(offset) {
+            let low = 0, high = options.count;
+            while (low < high) {
+                const mid = (low + high) >> 1;
+                if (offsets[mid + 1] <= offset) low = mid + 1; else high = mid;
+            }
+            return low;
+        }
+        
+        function fetchPage(start) {
+            if (requested.has(start)) return;
+            requested.add(start);
+            fetch(options.url(start))
+                .then(response => response.json())
+                .then(page => {
+                    if (destroyed) return;
+                    if (!page.success) {
+                        showError(page.error);
+                        return;
+                    }
+                    options.itemsOf(page).forEach((row, i) => loaded.set(page.start + i, row));
+                    schedule();
+                })
+                .catch(error => {
+                    requested.delete(start);
+                    showError('Network error: ' + error.message);
+                });
+        }
+        
+        function render() {
+            scheduled = false;
+            if (destroyed) return;
+            const headerHeight = headerEl ? headerEl.offsetHeight : 0;
+            const top = Math.max(0, viewport.scrollTop - headerHeight);
+            const first = Math.max(0, rowAt(top) - OVERSCAN);
+            const last = Math.min(options.count, rowAt(top + viewport.clientHeight) + OVERSCAN + 1);
+            
+            const rows = [];
+            for (let i = first; i < last; i++) {
+                if (!loaded.has(i)) fetchPage(i - i % PAGE_SIZE);
+                rows.push(options.render(i, loaded.get(i)));
+            }
+            windowEl.style.top = (headerHeight + offsets[first]) + 'px';
+            windowEl.innerHTML = options.wrap(rows.join(''));
+        }
+        
+        function schedule() {
+            if (!scheduled) {
+                scheduled = true;
+                requestAnimationFrame(render);
+            }
+        }
+        
+        function destroy() {
+            destroyed = true;
+            viewport.removeEventListener('scroll', schedule);
+            window.removeEventListener('resize', schedule);
+            tabButtons.forEach(button => button.removeEventListener('click', schedule));
+            loaded.clear();
+            virtualLists.delete(container);
+        }
+        
+        viewport.addEventListener('scroll', schedule);
+        window.addEventListener('resize', schedule);
+        tabButtons.forEach(button => button.addEventListener('click', schedule));
+        render();
+        
+        const list = {destroy: destroy};
+        virtualLists.set(container, list);
+        return list;
+    }
+    
+    function renderConflicts(container, conflicts) {
+        if (!conflicts || !conflicts.length) {
+            container.classList.add('hidden');
+            return;
+        }
+        container.innerHTML = '<strong>' + conflicts.length + ' conflict' + (conflicts.length === 1 ? '' : 's')
+            + '</strong><ul>' + conflicts.map(c =>
+                '<li>State ' + c.state + ', ' + escapeHtml(c.symbol) + ': ' + c.type + ' (' + c.actions.join(' vs ')
+                + ', kept ' + c.kept + ') ' + escapeHtml(c.items.join(' ')) + '</li>').join('') + '</ul>';
+        container.classList.remove('hidden');
+    }
+    
+    // What the reduction pre-pass changed, in terms of the grammar as written
+    function describeReduction(reduction) {
+        if (!reduction) {
+            return '';
+        }
+        const production = p => p[0] + ' -> ' + (p[1] || 'ε');
+        const lines = [];
+        if (reduction.removed_symbols.length) {
+            lines.push('Removed symbols: ' + reduction.removed_symbols.join(' '));
+        }
+        reduction.removed_productions.forEach(p => lines.push('Removed: ' + production(p)));
+        const renumbered = (reduction.production_origin || [])
+            .map((origin, id) => [id, origin])
+            .filter(([id, origin]) => id !== origin);
+        if (renumbered.length) {
+            lines.push('Production numbers without reduction: '
+                + renumbered.map(([id, origin]) => 'r' + id + ' was r' + origin).join(', '));
+        }
+        if (reduction.unit_states && reduction.unit_states.length) {
+            lines.push('Unit reduction states skipped by the parser: ' + reduction.unit_states.join(', '));
+        }
+        return lines.length ? '\n\n' + lines.join('\n') : '';
+    }
+    
+    function tableWidth(columns) {
+        return Math.max(columns * 70, 600);
+    }
+    
+    function escapeHtml(text) {
+        return String(text)
+            .replace(/&/g, '&amp;')
+            .replace(/</g, '&lt;')
+            .replace(/>/g, '&gt;')
+            .replace(/"/g, '&quot;');
+    }
+    
     // Helper Functions
     function showError(message) {
         errorMessage.textContent = message;
@@ -0,0 +1,41 @@
+import json
+
+
+def iter_json_string(chunks):
+    """Yields a JSON string literal built from an iterable of text chunks"""
+    yield '"'
+    for chunk in chunks:
+        # json.dumps escapes the chunk; strip its surrounding quotes
+        yield json.dumps(chunk, ensure_ascii=False)[1:-1]
+    yield '"'
+
+
+def iter_json_object(fields):
+    """Yields a JSON object from (key, value) pairs
+
+    Plain values are serialized whole; any other iterable is treated as a
+    stream of text chunks and written out as a single JSON string.
+    """
+    yield '{'
+    for i, (key, value) in enumerate(fields):
+        yield (', ' if i else '') + json.dumps(key) + ': '
+        if value is None or isinstance(value, (str, int, float, bool, list, dict)):
+            yield json.dumps(value, ensure_ascii=False)
+        else:
+            yield from iter_json_string(value)
+    yield '}'
+
+
+def buffered(chunks, size=64 * 1024):
+    """Joins small chunks into pieces of roughly `size` characters"""
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer)
@@ -0,0 +1,466 @@
+"""Versioned binary serialization of compiled grammars and an on-disk store for them
+
+A file holds everything the web app reads from a compiled grammar: the
+symbol table, productions, FIRST/FOLLOW sets, the states' items and
+transitions, the sparse ACTION/GOTO rows, and the comb-packed arrays used
+for parsing. Files are loaded with mmap and their int arrays are used in
+place through memoryviews. Processes that load the same file therefore
+share its pages, and nothing is recomputed.
+
+Layout: a header (magic, format version, byte order, int size, section
+count), then a directory of (name, offset, length) entries, then the
+8-byte aligned sections. Int sections are native int32 arrays. A file
+whose header does not match this build is treated as missing.
+"""
+import json
+import mmap
+import os
+import queue
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from collections.abc import Mapping, Sequence
+
+from parse_tables import CompactTable, encode_action, decode_action
+from profiling import NULL_STATS
+from slr_parser import Item, ParsingTable, TableViews
+
+MAGIC = b'SLRT'
+FORMAT_VERSION = 3
+HEADER = struct.Struct('<4sHBBI')        # magic, version, big-endian flag, int size, section count
+SECTION = struct.Struct('<32sQQ')        # name, offset, length
+BYTE_ORDER = 1 if sys.byteorder == 'big' else 0
+
+
+def int_array(values=()):
+    return array('i', values)
+
+
+def csr(rows, encode):
+    """Flattens a list of sparse rows into offsets, columns and values arrays"""
+    offsets = int_array([0])
+    columns = int_array()
+    values = int_array()
+    for row in rows:
+        for column, value in sorted(encode(row)):
+            columns.append(column)
+            values.append(value)
+        offsets.append(len(columns))
+    return offsets, columns, values
+
+
+def bit_rows(sets, symbols, terminal_column, width):
+    """Packs one set of terminals per symbol into fixed-width bit rows (bit i = terminal column i)"""
+    rows = bytearray(width * len(symbols))
+    for symbol_id, symbol in enumerate(symbols):
+        for terminal in sets.get(symbol, ()):
+            column = terminal_column.get(terminal)
+            if column is not None:
+                rows[symbol_id * width + column // 8] |= 1 << (column % 8)
+    return rows
+
+
+def dump_tables(parser):
+    """Serializes a compiled SLRParser into the binary format"""
+    grammar = parser.grammar
+    symbols = grammar.symbols
+    symbol_ids = grammar.symbol_ids
+    table = parser.get_compact_table()
+    terminal_column = table.terminal_index
+    non_terminal_column = table.non_terminal_index
+    width = (len(table.terminals) + 7) // 8
+
+    sections = {
+        'meta': json.dumps({
+            'mode': parser.mode,
+            'reduction': parser.reduction,
+            'conflicts': parser.conflicts,
+            'start_symbol': grammar.start_symbol,
+            'grammar': str(grammar),
+            'state_count': len(parser.canonical_collection)
+        }).encode('utf-8'),
+        'symbols': '\n'.join(symbols).encode('utf-8'),
+        'is_non_terminal': bytes(grammar.is_non_terminal),
+        'terminals': int_array(symbol_ids[t] for t in table.terminals),
+        'non_terminals': int_array(symbol_ids[nt] for nt in table.non_terminals),
+        'nullable': bytes(parser.nullable),
+        'first_bits': bit_rows(parser.first_sets, symbols, terminal_column, width),
+        'follow_bits': bit_rows(parser.follow_sets, symbols, terminal_column, width),
+        'production_symbol': int_array(grammar.production_lhs),
+        'rhs_offsets': int_array([0]),
+        'rhs': int_array()
+    }
+    for rhs in grammar.production_rhs:
+        sections['rhs'].extend(rhs)
+        sections['rhs_offsets'].append(len(sections['rhs']))
+
+    # Items and transitions of every state
+    state_offsets = int_array([0])
+    item_production = int_array()
+    item_dot = int_array()
+    for item_set in parser.canonical_collection:
+        for item in item_set.sorted_items():
+            item_production.append(item.production)
+            item_dot.append(item.dot_position)
+        state_offsets.append(len(item_production))
+    sections.update(state_offsets=state_offsets, item_production=item_production, item_dot=item_dot)
+
+    transitions = csr([item_set.transitions for item_set in parser.canonical_collection],
+                      lambda row: ((symbol_ids[symbol], target) for symbol, target in row.items()))
+    sections.update(zip(('transition_offsets', 'transition_symbols', 'transition_targets'), transitions))
+
+    # Sparse ACTION/GOTO rows as stored by the parser, for display
+    actions = csr(parser.action_table,
+                  lambda row: ((terminal_column[t], encode_action(action)) for t, action in row.items()))
+    sections.update(zip(('action_offsets', 'action_columns', 'action_codes'), actions))
+    gotos = csr(parser.goto_table, lambda row: ((non_terminal_column[nt], target) for nt, target in row.items()))
+    sections.update(zip(('goto_offsets', 'goto_columns', 'goto_targets'), gotos))
+
+    # Comb-packed arrays for the parse loop
+    for name in CompactTable.ARRAYS:
+        sections['table_' + name] = int_array(getattr(table, name))
+
+    # Header and directory, then each section at an 8-byte boundary
+    blobs = [(name.encode('ascii'), value.tobytes() if isinstance(value, array) else bytes(value))
+             for name, value in sections.items()]
+    offset = HEADER.size + SECTION.size * len(blobs)
+    directory = []
+    for name, blob in blobs:
+        offset += -offset % 8
+        directory.append(SECTION.pack(name, offset, len(blob)))
+        offset += len(blob)
+
+    out = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER, array('i').itemsize, len(blobs)))
+    for entry in directory:
+        out += entry
+    for name, blob in blobs:
+        out += bytes(-len(out) % 8)
+        out += blob
+    return bytes(out)
+
+
+def read_sections(buffer):
+    """Returns {name: memoryview} for a file in the current format, or None"""
+    if len(buffer) < HEADER.size:
+        return None
+    magic, version, byte_order, int_size, count = HEADER.unpack_from(buffer, 0)
+    if (magic, version, byte_order, int_size) != (MAGIC, FORMAT_VERSION, BYTE_ORDER, array('i').itemsize):
+        return None
+
+    view = memoryview(buffer)
+    sections = {}
+    for index in range(count):
+        name, offset, length = SECTION.unpack_from(buffer, HEADER.size + SECTION.size * index)
+        if offset + length > len(buffer):
+            return None
+        sections[name.rstrip(b'\0').decode('ascii')] = view[offset:offset + length]
+    return sections
+
+
+class GrammarSummary:
+    """The parts of Grammar the views read: start symbol, productions and the printed grammar"""
+
+    def __init__(self, start_symbol, productions, rhs_symbols, text):
+        self.start_symbol = start_symbol
+        self.productions = productions
+        self.rhs_symbols = rhs_symbols
+        self.text = text
+
+    def __str__(self):
+        return self.text
+
+
+class StoredItem:
+    __slots__ = ('grammar', 'production', 'dot_position')
+
+    def __init__(self, grammar, production, dot_position):
+        self.grammar = grammar
+        self.production = production
+        self.dot_position = dot_position
+
+    @property
+    def lhs(self):
+        return self.grammar.productions[self.production][0]
+
+    @property
+    def rhs(self):
+        return self.grammar.productions[self.production][1]
+
+    def is_complete(self):
+        return self.dot_position == len(self.grammar.rhs_symbols[self.production])
+
+    def get_next_symbol(self):
+        symbols = self.grammar.rhs_symbols[self.production]
+        return symbols[self.dot_position] if self.dot_position < len(symbols) else None
+
+    # Same rendering as a live item
+    __str__ = Item.__str__
+
+
+class StoredItems(Sequence):
+    def __init__(self, stored, start, end):
+        self.stored = stored
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        position = self.start + index
+        return StoredItem(self.stored.grammar, self.stored.item_production[position], self.stored.item_dot[position])
+
+
+class StoredItemSet:
+    def __init__(self, stored, state):
+        offsets = stored.state_offsets
+        self.index = state
+        self.items = StoredItems(stored, offsets[state], offsets[state + 1])
+        self.stored = stored
+
+    @property
+    def transitions(self):
+        stored = self.stored
+        start, end = stored.transition_offsets[self.index], stored.transition_offsets[self.index + 1]
+        return {stored.symbols[stored.transition_symbols[i]]: stored.transition_targets[i] for i in range(start, end)}
+
+    def sorted_items(self):
+        # Items were written in sorted order
+        return list(self.items)
+
+
+class StoredStates(Sequence):
+    def __init__(self, stored):
+        self.stored = stored
+
+    def __len__(self):
+        return len(self.stored.state_offsets) - 1
+
+    def __getitem__(self, state):
+        if not 0 <= state < len(self):
+            raise IndexError(state)
+        return StoredItemSet(self.stored, state)
+
+
+class StoredRows(Sequence):
+    """Sparse table rows decoded from CSR arrays on access"""
+
+    def __init__(self, offsets, columns, values, names, decode):
+        self.offsets = offsets
+        self.columns = columns
+        self.values = values
+        self.names = names
+        self.decode = decode
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, state):
+        if not 0 <= state < len(self):
+            raise IndexError(state)
+        return {self.names[self.columns[i]]: self.decode(self.values[i])
+                for i in range(self.offsets[state], self.offsets[state + 1])}
+
+
+class StoredSets(Mapping):
+    """FIRST or FOLLOW sets decoded from bit rows on access"""
+
+    def __init__(self, stored, bits, keys, first):
+        self.stored = stored
+        self.bits = bits
+        self.keys_list = keys
+        self.key_set = set(keys)
+        self.first = first  # FIRST sets also cover terminals and mark nullable symbols with ε
+
+    def __getitem__(self, symbol):
+        stored = self.stored
+        symbol_id = stored.symbol_ids.get(symbol)
+        if symbol_id is None or symbol not in self.key_set:
+            raise KeyError(symbol)
+        if self.first and not stored.is_non_terminal[symbol_id]:
+            return {symbol}
+
+        width = stored.bit_width
+        row = self.bits[symbol_id * width:(symbol_id + 1) * width]
+        result = {stored.terminal_names[column] for column in range(len(stored.terminal_names))
+                  if row[column // 8] >> (column % 8) & 1}
+        if self.first and stored.nullable[symbol_id]:
+            result.add('ε')
+        return result
+
+    def __iter__(self):
+        return iter(self.keys_list)
+
+    def __len__(self):
+        return len(self.keys_list)
+
+
+class StoredGrammar(TableViews):
+    """A compiled grammar read from the binary format; int arrays stay in the mapped buffer"""
+
+    def __init__(self, sections):
+        meta = json.loads(bytes(sections['meta']).decode('utf-8'))
+        ints = {name: view.cast('i') for name, view in sections.items()
+                if name not in ('meta', 'symbols', 'is_non_terminal', 'nullable', 'first_bits', 'follow_bits')}
+
+        self.mode = meta['mode']
+        self.reduction = meta['reduction']
+        self.conflicts = meta['conflicts']
+        self.stats = NULL_STATS
+        self.symbols = bytes(sections['symbols']).decode('utf-8').split('\n')
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.is_non_terminal = sections['is_non_terminal']
+        self.nullable = sections['nullable']
+
+        # Symbol table and productions are small and decoded once
+        self.terminal_names = [self.symbols[s] for s in ints['terminals']]
+        non_terminal_names = [self.symbols[s] for s in ints['non_terminals']]
+        self.terminals = set(self.terminal_names)
+        self.non_terminals = {symbol for s, symbol in enumerate(self.symbols) if self.is_non_terminal[s]}
+        rhs, rhs_offsets = ints['rhs'], ints['rhs_offsets']
+        rhs_symbols = [tuple(self.symbols[s] for s in rhs[rhs_offsets[p]:rhs_offsets[p + 1]])
+                       for p in range(len(rhs_offsets) - 1)]
+        self.productions = [(self.symbols[lhs], ' '.join(symbols))
+                            for lhs, symbols in zip(ints['production_symbol'], rhs_symbols)]
+        self.grammar = GrammarSummary(meta['start_symbol'], self.productions, rhs_symbols, meta['grammar'])
+
+        # States, table rows and sets are views over the mapped arrays
+        self.state_offsets = ints['state_offsets']
+        self.item_production = ints['item_production']
+        self.item_dot = ints['item_dot']
+        self.transition_offsets = ints['transition_offsets']
+        self.transition_symbols = ints['transition_symbols']
+        self.transition_targets = ints['transition_targets']
+        self.canonical_collection = StoredStates(self)
+        self.action_table = StoredRows(ints['action_offsets'], ints['action_columns'], ints['action_codes'],
+                                       self.terminal_names, decode_action)
+        self.goto_table = StoredRows(ints['goto_offsets'], ints['goto_columns'], ints['goto_targets'],
+                                     non_terminal_names, int)
+        self.parsing_table = ParsingTable(self)
+
+        self.bit_width = (len(self.terminal_names) + 7) // 8
+        self.first_sets = StoredSets(self, sections['first_bits'], self.symbols, first=True)
+        self.follow_sets = StoredSets(self, sections['follow_bits'],
+                                      [symbol for s, symbol in enumerate(self.symbols) if self.is_non_terminal[s]],
+                                      first=False)
+
+        self.compact_table = CompactTable.from_arrays(
+            self.terminal_names, non_terminal_names, self.productions,
+            {name: ints['table_' + name] for name in CompactTable.ARRAYS})
+
+    def get_compact_table(self):
+        return self.compact_table
+
+
+class TableStore:
+    """Directory of serialized grammars named by grammar key
+
+    Past max_entries files or max_bytes in total, the least recently used
+    files (by modification time, which load() refreshes) are deleted.
+    save_later() writes on a background thread so callers do not wait for
+    serialization or the disk; on_error(key, exception) is called there
+    for a write that fails with OSError.
+    """
+
+    SUFFIX = '.slrt'
+
+    def __init__(self, directory, max_entries=1024, max_bytes=1024 * 1024 * 1024, on_error=None):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.on_error = on_error
+        self.pending = queue.Queue()  # (key, parser) waiting for the writer thread
+        self.writer = None
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def contains(self, key):
+        return os.path.exists(self.path(key))
+
+    def save(self, key, parser):
+        """Writes the parser's tables; the file appears atomically so readers never see a partial one"""
+        data = dump_tables(parser)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, self.path(key))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self.evict()
+
+    def save_later(self, key, parser):
+        """Queues the parser to be saved by the writer thread and returns at once"""
+        with self.lock:
+            if self.writer is None:
+                self.writer = threading.Thread(target=self.write_pending, daemon=True)
+                self.writer.start()
+        self.pending.put((key, parser))
+
+    def write_pending(self):
+        while True:
+            key, parser = self.pending.get()
+            try:
+                self.save(key, parser)
+            except OSError as e:
+                if self.on_error is not None:
+                    self.on_error(key, e)
+            finally:
+                self.pending.task_done()
+
+    def flush(self):
+        """Waits until every queued save has been written"""
+        self.pending.join()
+
+    def evict(self):
+        """Deletes the least recently used files until the store is within its limits"""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        count = len(files)
+        total_bytes = sum(size for _, size, _ in files)
+        files.sort()
+        for _, size, path in files:
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            try:
+                # Processes that have the file mapped keep their pages
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            count -= 1
+            total_bytes -= size
+
+    def load(self, key):
+        """Maps a stored grammar, or returns None if it is missing or from another format version"""
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        sections = read_sections(buffer)
+        if sections is None:
+            return None
+        try:
+            # Marks the file as recently used for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return StoredGrammar(sections)
@@ -0,0 +1,30 @@
+import pytest
+
+from codegen import generate_parser_module, load_module, sample_sentences
+from slr_parser import SLRParser
+
+GRAMMARS = {
+    'expressions': "E -> E + T | T\nT -> T * F | F\nF -> ( E ) | id",
+    'lists': "L -> L , X | X\nX -> id | [ L ] | [ ]",
+    'nullable': "S -> A B c\nA -> a A | ε\nB -> b | ε",
+    'unproductive': "S -> a | B\nB -> B c",
+}
+
+
+@pytest.mark.parametrize('mode', ['slr', 'lalr'])
+@pytest.mark.parametrize('name', sorted(GRAMMARS))
+def test_generated_module_parses_like_the_table(name, mode):
+    parser = SLRParser(GRAMMARS[name], mode=mode)
+    module = load_module(generate_parser_module(parser, name))
+    table = parser.get_compact_table()
+
+    sentences = sample_sentences(parser, 50, seed=1)
+    assert sentences
+    sentences += [[], ['$'], sentences[0] + ['$']]
+    for tokens in sentences:
+        assert module.parse(tokens, build_tree=True) == table.parse(tokens, build_tree=True)
+
+
+def test_sentences_never_contain_the_end_marker():
+    parser = SLRParser(GRAMMARS['expressions'])
+    assert not any('$' in tokens for tokens in sample_sentences(parser, 200))
@@ -0,0 +1,49 @@
+import json
+import multiprocessing
+import os
+
+import pytest
+
+import compile_grammars
+
+pytestmark = pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                                reason='the patched worker only reaches forked processes')
+
+
+def crash_on_bad(path, *options):
+    if os.path.basename(path) == 'bad.txt':
+        os._exit(1)
+    return True, False, json.dumps({'file': path, 'ok': True})
+
+
+def test_dead_worker_fails_only_its_grammar(tmp_path, monkeypatch, capsys):
+    for name in ('a.txt', 'bad.txt', 'c.txt', 'd.txt'):
+        (tmp_path / name).write_text('S -> a\n')
+    monkeypatch.setattr(compile_grammars, 'compile_file', crash_on_bad)
+
+    output = tmp_path / 'results.jsonl'
+    status = compile_grammars.main([str(tmp_path), '-j', '2', '-o', str(output)])
+
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert status == 1
+    assert [os.path.basename(r['file']) for r in results] == ['a.txt', 'bad.txt', 'c.txt', 'd.txt']
+    assert [r['ok'] for r in results] == [True, False, True, True]
+    assert 'BrokenProcessPool' in results[1]['error']
+    assert '3 compiled, 1 failed' in capsys.readouterr().err
+
+
+def test_only_grammars_in_flight_are_retried_alone(tmp_path, monkeypatch):
+    names = ['a.txt', 'bad.txt'] + [f'g{i}.txt' for i in range(8)]
+    for name in names:
+        (tmp_path / name).write_text('S -> a\n')
+    monkeypatch.setattr(compile_grammars, 'compile_file', crash_on_bad)
+    retried = []
+    compile_alone = compile_grammars.compile_alone
+    monkeypatch.setattr(compile_grammars, 'compile_alone',
+                        lambda path, *options: retried.append(os.path.basename(path)) or compile_alone(path, *options))
+
+    files = [str(tmp_path / name) for name in names]
+    results = [json.loads(line) for _, _, line in compile_grammars.compile_all(files, 2, 'slr', False, 'none', False)]
+    assert [r['ok'] for r in results] == [name != 'bad.txt' for name in names]
+    assert 'bad.txt' in retried
+    assert len(retried) <= 2
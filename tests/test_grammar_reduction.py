@@ -0,0 +1,15 @@
+import pytest
+
+from slr_parser import SLRParser
+
+GRAMMAR = "S -> a | B\nB -> B c\nS -> C\nC -> d\nD -> e"
+
+
+@pytest.mark.parametrize('level', ['useless', 'units'])
+def test_production_origin_maps_reduced_productions_back(level):
+    reduced = SLRParser(GRAMMAR, reduction=level)
+    unreduced = SLRParser(GRAMMAR)
+    origin = reduced.to_dict()['reduction']['production_origin']
+
+    assert origin == [0, 1, 4, 5]
+    assert [unreduced.grammar.productions[o] for o in origin] == reduced.grammar.productions
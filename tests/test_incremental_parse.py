@@ -0,0 +1,111 @@
+import random
+
+import pytest
+
+import incremental_parse
+from incremental_parse import CHUNK_TOKENS, IncrementalParser
+from slr_parser import SLRParser
+
+GRAMMARS = {
+    'expressions': "E -> E + T | T\nT -> T * F | F\nF -> ( E ) | id",
+    'lists': "L -> L , X | X\nX -> id | [ L ] | [ ]",
+    'unit chains': "S -> S ; A | A\nA -> B\nB -> id | { S }",
+    'right lists': "S -> id , S | id",
+}
+ELEMENTS = {
+    'expressions': (' + ', ['id', 'id * id', '( id + id )']),
+    'lists': (' , ', ['id', '[ ]', '[ id , id ]']),
+    'unit chains': (' ; ', ['id', '{ id }', '{ id ; id }']),
+    'right lists': (' , ', ['id']),
+}
+TOKENS = ['id', '+', '*', '(', ')', ',', ';', '[', ']', '{', '}', '$']
+
+
+def fresh(parser, text):
+    document = IncrementalParser(parser)
+    return document.parse_text(text, build_tree=True)
+
+
+def comparable(result):
+    return {key: value for key, value in result.items() if key != 'reductions'}
+
+
+@pytest.mark.parametrize('mode', ['slr', 'lalr'])
+@pytest.mark.parametrize('name', sorted(GRAMMARS))
+def test_edits_give_the_same_result_as_a_fresh_parse(name, mode, monkeypatch):
+    # Small chunks so that edits split and merge them
+    monkeypatch.setattr(incremental_parse, 'CHUNK_TOKENS', 8)
+    parser = SLRParser(GRAMMARS[name], mode=mode)
+    rng = random.Random(7)
+    separator, choices = ELEMENTS[name]
+    elements = ['id'] * 150
+    document = IncrementalParser(parser)
+    assert document.parse_text(separator.join(elements), build_tree=True) == fresh(parser, document.text)
+
+    for _ in range(200):
+        index = rng.randrange(len(elements))
+        start = sum(len(element) + len(separator) for element in elements[:index])
+        action = rng.randrange(4)
+        if action == 0:
+            # Replace an element's tokens
+            element = rng.choice(choices)
+            first = sum(len(item.split()) + len(separator.split()) for item in elements[:index])
+            result = document.edit(first, first + len(elements[index].split()), element.split(), build_tree=True)
+            elements[index] = element
+        elif action == 1 and len(elements) > 1:
+            # Delete an element with the separator after it, or before it for the last one
+            if index == len(elements) - 1:
+                start -= len(separator)
+            result = document.edit_text(start, start + len(elements[index]) + len(separator), '', build_tree=True)
+            del elements[index]
+        elif action == 2:
+            # Insert an element before another
+            element = rng.choice(choices)
+            result = document.edit_text(start, start, element + separator, build_tree=True)
+            elements.insert(index, element)
+        else:
+            # A random edit, undone by a second one so that both go through the pending edit
+            end = min(start + rng.randrange(8), document.document.length)
+            removed = document.text[start:end]
+            replacement = ' '.join(rng.choice(TOKENS) for _ in range(rng.randrange(3)))
+            result = document.edit_text(start, end, replacement, build_tree=True)
+            assert comparable(result) == comparable(fresh(parser, document.text))
+            result = document.edit_text(start, start + len(replacement), removed, build_tree=True)
+        assert document.text == separator.join(elements)
+        assert result['accepted']
+        assert comparable(result) == comparable(fresh(parser, document.text))
+
+
+def test_a_small_edit_in_a_long_list_touches_few_nodes():
+    parser = SLRParser(GRAMMARS['lists'])
+    document = IncrementalParser(parser)
+    count = 20 * CHUNK_TOKENS
+    assert document.parse_text(' , '.join(['id'] * count))['accepted']
+
+    for index in (1, count // 2, count - 2):
+        result = document.edit(2 * index, 2 * index + 1, ['[', 'id', ']'], build_tree=True)
+        assert result['accepted']
+        assert document.stats['stream_nodes'] < 200
+        assert document.stats['shifted_tokens'] < 20
+
+
+def test_a_literal_end_marker_is_an_unknown_token():
+    parser = SLRParser(GRAMMARS['expressions'])
+    document = IncrementalParser(parser)
+    assert document.parse_text('id + id')['accepted']
+    result = document.edit_text(7, 7, ' $')
+    assert not result['accepted']
+    assert (result['position'], result['token']) == (3, '$')
+
+
+def test_replacing_most_of_a_long_document_keeps_its_chunks_filled():
+    parser = SLRParser(GRAMMARS['lists'])
+    document = IncrementalParser(parser)
+    assert document.parse_text(' , '.join(['id'] * 25600))['accepted']
+    assert len(document.document.texts) == 200
+
+    text = ' , '.join(['x'] * 14901)
+    result = document.edit_text(0, document.document.length, text)
+    assert comparable(result) == comparable(fresh(parser, text))
+    assert document.text == text
+    assert all(document.document.tokens)
@@ -0,0 +1,53 @@
+import pytest
+
+from slr_parser import SLRParser
+
+EXPRESSIONS = "E -> E + T | T\nT -> T * F | F\nF -> ( E ) | id"
+
+
+@pytest.fixture(scope='module')
+def table():
+    return SLRParser(EXPRESSIONS).get_compact_table()
+
+
+def test_accepts_sentence(table):
+    result = table.parse('id + id * id', build_tree=True)
+    assert result['accepted']
+    assert result['tree'][0] == 'E'
+
+
+def test_reports_error_position(table):
+    result = table.parse('id + * id')
+    assert not result['accepted']
+    assert result['position'] == 2
+    assert result['token'] == '*'
+    assert set(result['expected']) == {'(', 'id'}
+
+
+def test_dollar_in_input_is_not_the_end_marker(table):
+    result = table.parse('id $ * + ) (')
+    assert not result['accepted']
+    assert result['position'] == 1
+    assert result['token'] == '$'
+    assert not table.parse(['id', '$'])['accepted']
+
+
+def test_parse_input_rejects_string_inputs():
+    from app import app
+    client = app.test_client()
+    response = client.post('/parse-input', json={'grammar': EXPRESSIONS, 'inputs': 'id + id'})
+    assert response.status_code == 400
+    response = client.post('/parse-input', json={'grammar': EXPRESSIONS, 'inputs': ['id + id', ['id', '$']]})
+    assert [r['accepted'] for r in response.get_json()['results']] == [True, False]
+
+
+def test_expected_terminals_of_a_default_reduction_state(table):
+    from codegen import generate_parser_module, load_module
+    from incremental_parse import IncrementalParser
+
+    parser = SLRParser(EXPRESSIONS)
+    # After 'id' the only action is reducing F -> id, the state's default
+    expected = ['$', ')', '*', '+']
+    assert table.parse('id foo')['expected'] == expected
+    assert load_module(generate_parser_module(parser, 'expressions')).parse('id foo')['expected'] == expected
+    assert IncrementalParser(parser).parse_text('id foo')['expected'] == expected
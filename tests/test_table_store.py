@@ -0,0 +1,33 @@
+import os
+
+from slr_parser import SLRParser
+from table_store import TableStore
+
+GRAMMARS = ["S -> a S | a", "E -> E + id | id", "L -> L , x | x"]
+
+
+def test_saved_grammar_parses_like_the_original(tmp_path):
+    store = TableStore(str(tmp_path))
+    parser = SLRParser(GRAMMARS[1])
+    store.save_later('expr', parser)
+    store.flush()
+
+    stored = store.load('expr')
+    for sentence in ('id + id', 'id + + id', 'id'):
+        assert stored.get_compact_table().parse(sentence) == parser.get_compact_table().parse(sentence)
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    store = TableStore(str(tmp_path), max_entries=2)
+    for index, grammar in enumerate(GRAMMARS[:2]):
+        store.save(f'g{index}', SLRParser(grammar))
+        os.utime(store.path(f'g{index}'), (index, index))
+
+    # Loading g0 makes g1 the least recently used
+    assert store.load('g0') is not None
+    store.save('g2', SLRParser(GRAMMARS[2]))
+    assert [store.contains(f'g{index}') for index in range(3)] == [True, False, True]
+
+    store.max_bytes = os.path.getsize(store.path('g2'))
+    store.evict()
+    assert sorted(os.listdir(tmp_path)) == ['g2.slrt']